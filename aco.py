@@ -1,23 +1,42 @@
 import numpy as np
-import copy
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from candidate import patterns_of
+from ledger import OrderLedger
+from random_search import RandomSearch
+from random_stream import RandomStream
+from evo import EVO
+from bounds import optimality_gap, gap_closed
+from pheromone import Pheromone
+from ranking import Ranking
+from instrument import Instruments, timed, SUMMARY, PROGRESS, TRACE
+from anytime import Control
 
 
 class ACO:
     def __init__(self, stocks, rng, rs, evo):
         """
         :param stocks: dictionary of stocks
-        :param rng: random number generator
+        :param rng: numpy random Generator of the engine, or a seed it is created from
         :param rs: random search model
         :param evo: evolution model
 
         :return:
         """
         self.stocks = stocks
-        self.rng = rng
+        self.generator = np.random.default_rng(rng)
+        self.stream = RandomStream(self.generator)  # pre-drawn blocks for following trails
         self.rs = rs
         self.evo = evo
         self.orders = {}
+        self.ledger = OrderLedger(self.orders)
+        self.bound = None  # lower bound of the problem
+        self.gap_tol = 0.0  # accepted optimality gap
+        self.inst = Instruments()  # timers, counters and verbosity
+        self.trail = None  # pheromone trail left by the last run
+        self.control = Control()  # deadline, cancellation and improvement listeners
+        self.unique = False  # mutate new ants duplicating a candidate of their colony
 
     """
     Initialisation:
@@ -25,12 +44,14 @@ class ACO:
     Cycle:
         - The next best candidate returns to home, leaving a trail of pheromone, then sets off following the trail.
         - At the end of each cycle, pheromone trail decays slightly.
+        - Optionally, a new candidate duplicating one of the colony is mutated before it is ranked.
     Termination:
         - If cycle exceeded.
-        - If time is up.
+        - If time is up or the run is cancelled.
         - If target is reached.
     """
-    def run(self, pop=None, population=100, cycles=500, decay=-0.5):
+    @timed("aco.run")
+    def run(self, pop=None, population=100, cycles=500, decay=-0.5, trail=None, t=None):
         """
         Run the ACO algorithm.
 
@@ -38,49 +59,70 @@ class ACO:
         :param population: population size
         :param cycles: number of cycles (travels)
         :param decay: rate of decay
+        :param trail: starting pheromone trail, e.g. from the pattern cache, an empty trail if None
+        :param t: time limit in seconds, None for no limit
 
         :return:
         """
-        print("------------------ACO------------------")
-        print("Initialisation")
-        log = {"candidates": [],
-               "times": []}
-        if pop is None:  # if population not predefined
-            print("Initialising colony.")
-            pop = []
-            for i in range(population):
-                pop.append(self.rs.random_candidate())
-        start_time = time.time()
-        rank_f = self.update_fitness(pop)  # sorted dictionary {index from pop: fitness}
-        best = []  # best candidate
-        convergence = 2*len(pop)
-        go = True
-        while go:
-            pheromone = {}
-            for i in range(cycles):
-                print("------------Cycle {}------------".format(i))
-                i = next(iter(rank_f))  # index of next candidate to return home and set off
-                if not best or self.rs.get_fitness(best) > self.rs.get_fitness(pop[i]):
-                    best = pop[i]
-                    log["candidates"].append(best)
-                    log["times"].append(time.time() - start_time)
-                    convergence = 2*len(pop)
-                else:
-                    convergence -= 1
-                    print(convergence)
-                    if convergence <= 0:
-                        print("Converged.")
+        self.inst.log(SUMMARY, "------------------ACO------------------")
+        self.inst.log(SUMMARY, "Initialisation")
+        log = self.inst.run_log("aco.run")
+        try:
+            if pop is None:  # if population not predefined
+                self.inst.log(SUMMARY, "Initialising colony.")
+                pop = self.rs.initial_candidates(population, self.stream)
+            else:
+                pop = self.rs.as_candidates(pop)
+            start_time = time.time()
+            rank_f = self.update_fitness(pop)  # ranking of the indexes from pop by fitness
+            keys = Counter(c.key for c in pop) if self.unique else None  # canonical keys of the colony
+            best = []  # best candidate
+            convergence = 2*len(pop)
+            go = True
+            while go:
+                pheromone = Pheromone(self.stocks) if trail is None else trail
+                for i in range(cycles):
+                    self.inst.log(PROGRESS, "------------Cycle {}------------".format(i))
+                    i = rank_f.peek()[0]  # index of next candidate to return home and set off
+                    if not best or self.rs.get_fitness(best) > self.rs.get_fitness(pop[i]):
+                        best = pop[i]
+                        log.record(best, self.rs.get_fitness(best), time.time() - start_time)
+                        self.control.improved(best, self.rs.get_fitness(best))
+                        convergence = 2*len(pop)
+                    else:
+                        convergence -= 1
+                        self.inst.log(TRACE, convergence)
+                        if convergence <= 0:
+                            self.inst.log(SUMMARY, "Converged.")
+                            go = False
+                            break
+                    self.inst.log(PROGRESS, "Best fitness: ", self.rs.get_fitness(best))
+                    if self.bound is not None:
+                        self.inst.log(PROGRESS, "Optimality gap: {:.2%}".format(optimality_gap(self.rs.get_fitness(best), self.bound)))
+                    if gap_closed(self.rs.get_fitness(best), self.bound, self.gap_tol):
+                        self.inst.log(SUMMARY, "Optimality gap closed! Terminating.")
+                        go = False
+                        break
+                    if (t is not None and time.time() - start_time > t) or self.control.expired():
+                        self.inst.log(SUMMARY, "Time is up. Terminating.")
                         go = False
                         break
-                print("Best fitness: ", self.rs.get_fitness(best))
-                pheromone = self.update_trail(pop[i], pheromone)
-                pop[i] = self.set_off(pheromone)
-                rank_f = self.update_fitness(c=pop[i], rank=rank_f)  # ranked fitness
-                pheromone = self.decay(pheromone, decay)
-            go = False
+                    pheromone = self.update_trail(pop[i], pheromone)
+                    if keys is None:
+                        pop[i] = self.set_off(pheromone)
+                    else:
+                        keys[pop[i].key] -= 1
+                        pop[i] = self.distinct(self.set_off(pheromone), keys)
+                        keys[pop[i].key] += 1
+                    rank_f = self.update_fitness(c=pop[i], rank=rank_f)  # ranked fitness
+                    pheromone = self.decay(pheromone, decay)
+                go = False
+        finally:
+            log.close()
+        self.trail = pheromone
         return best, self.rs.get_fitness(best), time.time() - start_time, log
 
-    def run_iterative(self, pop=None, population=100, cycles=500, decay=-0.5, iterations=100):
+    def run_iterative(self, pop=None, population=100, cycles=500, decay=-0.5, iterations=100, t=None):
         """
         Run the ACO algorithm iteratively.
 
@@ -89,21 +131,239 @@ class ACO:
         :param cycles:
         :param decay:
         :param iterations:
+        :param t: time limit in seconds over all iterations, None for no limit
 
         :return:
         """
-        print("------------------Iterative ACO------------------")
+        self.inst.log(SUMMARY, "------------------Iterative ACO------------------")
         best, fitness, run_time, log = None, None, None, None
+        start_time = time.time()
         for i in range(iterations):
-            print("--------------Iteration {}--------------".format(i))
+            self.inst.log(PROGRESS, "--------------Iteration {}--------------".format(i))
+            left = None if t is None else t - (time.time() - start_time)
             if i == 0:
-                best, fitness, run_time, log = self.run(pop=pop, cycles=cycles, decay=decay)
-            for j in range(population):
-                pop = self.rs.random_candidate()
+                best, fitness, run_time, log = self.run(pop=pop, cycles=cycles, decay=decay, t=left)
+                left = None if t is None else t - (time.time() - start_time)
+            if (left is not None and left <= 0) or self.control.expired():
+                break
+            pop = self.rs.initial_candidates(population, self.stream)
             pop[0] = best
-            best, fitness, run_time, log = self.run(pop=pop, cycles=cycles, decay=decay)
+            best, fitness, run_time, log = self.run(pop=pop, cycles=cycles, decay=decay, t=left)
         return best, fitness, run_time, log
 
+    @timed("aco.run_parallel")
+    def run_parallel(self, pop=None, population=100, cycles=500, decay=-0.5, ants=None, colonies=1,
+                     exchange_interval=10, exchange_rate=0.5, workers=None, seed=None, t=None):
+        """
+        Run the ACO algorithm with many ants per cycle. Every cycle the next best ants of each colony return home
+        and leave their trails, then set off concurrently over a process pool, all following a snapshot of their
+        colony's pheromone. The trail decays once per cycle. Colonies blend their trails every exchange_interval
+        cycles.
+
+        :param pop: predefined population, shared out round robin between the colonies
+        :param population: population size per colony
+        :param cycles: number of cycles (travels)
+        :param decay: rate of decay
+        :param ants: number of ants setting off per colony and cycle, defaults to one per worker
+        :param colonies: number of colonies
+        :param exchange_interval: number of cycles between trail exchanges
+        :param exchange_rate: share of the colonies' mean trail blended into each colony's trail
+        :param workers: number of worker processes, 1 runs in this process
+        :param seed: root seed of the ant streams, drawn from the engine's generator if None
+        :param t: time limit in seconds, None for no limit
+
+        :return: the best solution, fitness, time elapsed (in seconds)
+        """
+        self.inst.log(SUMMARY, "------------------Parallel ACO------------------")
+        self.inst.log(SUMMARY, "Initialisation")
+        log = self.inst.run_log("aco.run_parallel")
+        workers = workers or 1
+        ants = ants or workers
+        if seed is None:
+            seed = int(self.generator.integers(1 << 63))
+        streams = np.random.SeedSequence(seed)
+        colony_rs = RandomSearch(self.stocks, np.random.default_rng(streams.spawn(1)[0]))
+        colony_rs.set_order(self.orders)
+        colony_rs.set_construction(*self.rs.construction())
+        colony_pops = []
+        for k in range(colonies):
+            if pop is None:  # if population not predefined
+                colony_pops.append(colony_rs.initial_candidates(population))
+            else:
+                colony_pops.append(self.rs.as_candidates(pop[k::colonies]))
+        start_time = time.time()
+        ranks = [self.update_fitness(p) for p in colony_pops]
+        keys = [Counter(c.key for c in p) for p in colony_pops] if self.unique else None
+        pheromones = [Pheromone(self.stocks) for k in range(colonies)]
+        best = []  # best candidate
+        convergence = 2*max(len(p) for p in colony_pops)
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for cycle in range(cycles):
+                self.inst.log(PROGRESS, "------------Cycle {}------------".format(cycle))
+                returned = []  # indexes returning home, per colony
+                improved = False
+                for k in range(colonies):
+                    returned.append(ranks[k].smallest(min(ants, len(colony_pops[k]))))
+                    for i in returned[k]:
+                        if not best or self.rs.get_fitness(best) > self.rs.get_fitness(colony_pops[k][i]):
+                            best = colony_pops[k][i]
+                            log.record(best, self.rs.get_fitness(best), time.time() - start_time)
+                            self.control.improved(best, self.rs.get_fitness(best))
+                            improved = True
+                        pheromones[k] = self.update_trail(colony_pops[k][i], pheromones[k])
+                convergence = 2*max(len(p) for p in colony_pops) if improved else convergence - sum(map(len, returned))
+                if convergence <= 0:
+                    self.inst.log(SUMMARY, "Converged.")
+                    break
+                self.inst.log(PROGRESS, "Best fitness: ", self.rs.get_fitness(best))
+                if self.bound is not None:
+                    self.inst.log(PROGRESS, "Optimality gap: {:.2%}".format(optimality_gap(self.rs.get_fitness(best), self.bound)))
+                if gap_closed(self.rs.get_fitness(best), self.bound, self.gap_tol):
+                    self.inst.log(SUMMARY, "Optimality gap closed! Terminating.")
+                    break
+                if (t is not None and time.time() - start_time > t) or self.control.expired():
+                    self.inst.log(SUMMARY, "Time is up. Terminating.")
+                    break
+                jobs = []  # (colony, ant seeds), one stream per ant so results do not depend on the worker count
+                for k in range(colonies):
+                    seeds = streams.spawn(len(returned[k]))
+                    for chunk in np.array_split(np.arange(len(seeds)), min(workers, len(seeds))):
+                        jobs.append((k, [seeds[j] for j in chunk]))
+                with self.inst.phase("sampling"):
+                    if executor is None:
+                        results = [set_off_batch(self.stocks, self.orders, pheromones[k], seeds, self.inst.verbosity,
+                                                 self.rs.construction())
+                                   for k, seeds in jobs]
+                    else:
+                        results = list(executor.map(set_off_batch,
+                                                    *zip(*[(self.stocks, self.orders, pheromones[k], seeds,
+                                                            self.inst.verbosity, self.rs.construction())
+                                                           for k, seeds in jobs])))
+                new_ants = [[] for k in range(colonies)]
+                self.inst.count("candidates", sum(len(seeds) for k, seeds in jobs))
+                for (k, seeds), candidates in zip(jobs, results):
+                    new_ants[k] += candidates
+                for k in range(colonies):
+                    if keys is not None:
+                        for j, i in enumerate(returned[k]):
+                            keys[k][colony_pops[k][i].key] -= 1
+                            new_ants[k][j] = self.distinct(new_ants[k][j], keys[k])
+                            keys[k][new_ants[k][j].key] += 1
+                    ranks[k] = self.update_fitness(c=new_ants[k], rank=ranks[k], returned=returned[k])
+                    for i, c in zip(returned[k], new_ants[k]):
+                        colony_pops[k][i] = c
+                    pheromones[k] = self.decay(pheromones[k], decay)
+                if colonies > 1 and (cycle + 1) % exchange_interval == 0:
+                    pheromones = self.exchange_trails(pheromones, exchange_rate)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            log.close()
+        self.trail = pheromones[0] if colonies == 1 else self.exchange_trails(pheromones, 1)[0]
+        return best, self.rs.get_fitness(best), time.time() - start_time, log
+
+    def exchange_trails(self, pheromones, rate):
+        """
+        Blend every colony's trail with the mean trail of all colonies.
+
+        :param pheromones: array of pheromone trails
+        :param rate: share of the mean trail, 0 keeps the trails, 1 replaces them with the mean
+
+        :return: array of blended pheromone trails
+        """
+        trails = [p.to_dict() for p in pheromones]
+        mean = {"pheno": {}, "geno": {}}
+        for p in trails:
+            for l, weight in p["pheno"].items():
+                mean["pheno"][l] = mean["pheno"].get(l, 0) + weight / len(trails)
+            for l, genos in p["geno"].items():
+                mean["geno"].setdefault(l, {})
+                for geno, weight in genos.items():
+                    mean["geno"][l][geno] = mean["geno"][l].get(geno, 0) + weight / len(trails)
+        blended = []
+        for p in trails:
+            new_ = {"pheno": {}, "geno": {}}
+            for l, weight in mean["pheno"].items():
+                new_["pheno"][l] = (1 - rate) * p["pheno"].get(l, 0) + rate * weight
+            for l, genos in mean["geno"].items():
+                new_["geno"][l] = {}
+                for geno, weight in genos.items():
+                    new_["geno"][l][geno] = (1 - rate) * p["geno"].get(l, {}).get(geno, 0) + rate * weight
+            blended.append(Pheromone.from_dict(self.stocks, new_))
+        return blended
+
+    def set_bound(self, bound, gap_tol=0.0):
+        """
+        Set the lower bound used to report the optimality gap and stop once it closes.
+
+        :param bound: lower bound of the problem, None disables it
+        :param gap_tol: accepted relative gap
+
+        :return: None
+        """
+        self.bound = bound
+        self.gap_tol = gap_tol
+
+    def set_instruments(self, inst):
+        """
+        Set the instruments recording timers, counters and output verbosity.
+
+        :param inst: Instruments
+
+        :return: None
+        """
+        self.inst = inst
+
+    def set_control(self, control):
+        """
+        Set the run control: deadline, cancellation and improvement listeners.
+
+        :param control: Control
+
+        :return: None
+        """
+        self.control = control
+
+    def reseed(self, seed):
+        """
+        Restart the trail-following stream from a seed.
+
+        :param seed: integer or SeedSequence
+
+        :return: None
+        """
+        self.generator = np.random.default_rng(seed)
+        self.stream = RandomStream(self.generator)
+
+    def set_unique(self, unique):
+        """
+        Set whether new candidates duplicating one of their colony, up to the order of activities and pieces, are
+        mutated before they are ranked.
+
+        :param unique: True or False
+
+        :return: None
+        """
+        self.unique = unique
+
+    def distinct(self, c, keys, attempts=3):
+        """
+        Mutate a new candidate while it duplicates a candidate of the colony, at most attempts times.
+
+        :param c: new candidate
+        :param keys: Counter of the canonical keys of the colony
+        :param attempts: maximum number of mutations
+
+        :return: candidate
+        """
+        for k in range(attempts):
+            if keys[c.key] <= 0:
+                break
+            self.inst.count("duplicates")
+            c = self.evo.mutate(c, 0.5)
+        return c
+
     def set_order(self, orders):
         """
         Set order
@@ -113,94 +373,87 @@ class ACO:
         :return: None
         """
         self.orders = orders
+        self.ledger = OrderLedger(orders)
 
-    def update_fitness(self, pop=None, rank=None, c=None):
+    def update_fitness(self, pop=None, rank=None, c=None, returned=None):
         """
-        Updates the fitness ranking dictionary.
+        Updates the fitness ranking. Every fitness is first lowered by the fitness of the first ranked ant, then
+        the returned ants take the fitness of their new candidates. O(log n) per returned ant.
 
         :param pop: array of candidates
-        :param rank: array of previous ranks {i: f}
-        :param c: new candidate
+        :param rank: previous ranking {i: f}
+        :param c: new candidate, or array of new candidates when returned is given
+        :param returned: indexes of the ants replaced by the candidates in c, the first ranked one if None
 
-        :return: sorted fitness dictionary
+        :return: fitness ranking
         """
-        fitnesses = {}  # dict of fitness
         if pop is not None:
-            for i, c in enumerate(pop):
-                fitnesses[i] = self.rs.get_fitness(c)
+            return Ranking(dict(enumerate(self.rs.get_fitnesses(pop).tolist())))
+        i, prev = rank.peek()
+        rank.shift(prev)
+        if returned is None:
+            rank.update(i, self.rs.get_fitness(c))
         else:
-            fitnesses = rank
-            i = next(iter(fitnesses))
-            prev = fitnesses[i]
-            for j in range(len(fitnesses)):
-                fitnesses[j] -= prev
-            fitnesses[i] = self.rs.get_fitness(c)
-        sorted_f = dict(sorted(fitnesses.items(), key=lambda item: item[1]))
-        return sorted_f
+            for j, candidate in zip(returned, c):
+                rank.update(j, self.rs.get_fitness(candidate))
+        return rank
 
+    @timed("pheromone_update")
     def update_trail(self, c, pheromone):
         """
         Return a new pheromone trail.
 
         :param c: candidate
-        :param pheromone: previous pheromone {{phenotype space}, {genotype space}}
+        :param pheromone: previous pheromone trail, a new one is started if empty
 
         :return: updated pheromone trail
         """
-        print("Leaving trail...")
+        self.inst.log(TRACE, "Leaving trail...")
         if not pheromone:  # if pheromone trail is empty
-            pheromone = {"pheno": {},  # {l: weight}
-                         "geno": {}}  # {l: {[rl..]: weight}}
-        for a in c:
-            pheromone["pheno"][a[0]] = pheromone["pheno"].get(a[0], 0) + 1
-            rl_counter = {}
-            for rl in a[1:]:
-                rl_counter[rl] = rl_counter.get(rl, 0) + 1
-            sorted_counter = dict(sorted(rl_counter.items()))
-            rl_tuple = tuple(sorted_counter.items())
-            pheromone["geno"][a[0]] = pheromone["geno"].get(a[0], {})
-            pheromone["geno"][a[0]][rl_tuple] = pheromone["geno"][a[0]].get(rl_tuple, 0) + 1
+            pheromone = Pheromone(self.stocks)
+        for (l, rl_tuple), n in patterns_of(c).items():
+            pheromone.deposit(l, rl_tuple, n)  # one unit per bar
         return pheromone
 
+    @timed("sampling")
     def set_off(self, pheromone):
         """
-        Candidate follows the given pheromone trail.
+        Candidate follows the given pheromone trail. Patterns that no longer fit the remaining orders are masked
+        for this candidate only, the trail itself is left untouched.
 
         :param pheromone: pheromone trail
 
         :return: new candidate
         """
-        print("Following pheromone trail...")
-        c = []
-        p = copy.deepcopy(pheromone)
-        orders = self.orders.copy()
-        while sum(orders.values()) > 0:  # while orders remaining
-            if not p["geno"]:
-                c = self.evo.fill_order(c)
+        self.inst.log(TRACE, "Following pheromone trail...")
+        self.inst.count("candidates")
+        c = self.rs.new_candidate()
+        view = pheromone.view()
+        orders = self.ledger.copy()
+        while orders.total > 0:  # while orders remaining
+            choice = view.sample(self.stream.random)
+            if choice is None:  # trail expended
+                c = self.evo.fill_order(c, orders, self.stream)
                 return c
-            a = []
-            weights = [num / sum(list(p["pheno"].values())) for num in list(p["pheno"].values())]  # pheno weights
-            a.append(int(np.random.choice(list(p["pheno"].keys()), 1, p=weights)))  # stock length
-            weights = [num / sum(list(p["geno"][a[0]].values())) for num in list(p["geno"][a[0]].values())]  # geno weights
-            keys = list(p["geno"][a[0]].keys())
-            geno_key = int(np.random.choice([i for i in range(len(keys))], 1, p=weights))
-            geno_dict = dict(keys[geno_key])
-            geno_array = []
-            for key in geno_dict.keys():
-                for i in range(int(geno_dict[key])):
-                    geno_array.append(key)
-            a = a + geno_array
-            if self.evo.activity_is_valid(a, orders):
-                c.append(a)
-                for rl in a[1:]:
-                    orders[rl] -= 1
+            if self.rs.packed:  # a random number of bars of the pattern, up to as many as fit
+                l, rl_tuple = choice[0], pheromone.pattern(*choice)
+                repeats = orders.repeats(rl_tuple)
+                if repeats > 0:
+                    n = 1 + int(self.stream.random() * repeats)
+                    c.add_pattern(l, rl_tuple, n, self.stocks[l])
+                    orders.subtract_pattern(rl_tuple, n)
+                else:
+                    view.exclude(*choice)
+                continue
+            a = pheromone.activity(*choice)
+            if orders.can_subtract(a):
+                c.add(a, self.stocks[a[0]])
+                orders.subtract(a)
             else:  # chosen activity not valid
-                p["geno"][a[0]].pop(keys[geno_key], None)
-                if not p["geno"][a[0]]:
-                    p["geno"].pop(a[0], None)
-                    p["pheno"].pop(a[0], None)
+                view.exclude(*choice)
         return c
 
+    @timed("pheromone_update")
     def decay(self, p, d):
         """
         Decay the pheromone trail by the specified amount
@@ -210,13 +463,35 @@ class ACO:
 
         :return: updated pheromone
         """
-        for pheno in list(p["pheno"].keys()):
-            p["pheno"][pheno] += d
-            if p["pheno"][pheno] <= 0:
-                p["pheno"].pop(pheno, None)
-        for stock in list(p["geno"].keys()):
-            for geno in list(p["geno"][stock].keys()):
-                p["geno"][stock][geno] += d
-                if p["geno"][stock][geno] <= 0:
-                    p["geno"][stock].pop(geno, None)
+        p.decay(d)
         return p
+
+
+def set_off_batch(stocks, orders, pheromone, seeds, verbosity=TRACE, construction=None):
+    """
+    Let ants follow a pheromone trail, every ant with its own random stream.
+
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+    :param pheromone: pheromone trail snapshot
+    :param seeds: array of SeedSequence, one per ant
+    :param verbosity: output verbosity of the ants
+    :param construction: construction strategies (init, fill, noise), uniform random if None
+
+    :return: array of new candidates
+    """
+    rs = RandomSearch(stocks, None)
+    evo = EVO(stocks, None, rs)
+    aco = ACO(stocks, None, rs, evo)
+    inst = Instruments(verbosity)
+    for x in (rs, evo, aco):
+        x.set_order(orders)
+        x.set_instruments(inst)
+    if construction is not None:
+        rs.set_construction(*construction)
+    candidates = []
+    for seed in seeds:
+        for x, s in zip((rs, evo, aco), seed.spawn(3)):
+            x.reseed(s)
+        candidates.append(aco.set_off(pheromone))
+    return candidates
@@ -0,0 +1,175 @@
+import asyncio
+import math
+import time
+
+
+class Control:
+    def __init__(self, t=None):
+        """
+        Run control shared with a running engine: a wall-clock deadline that can be extended, cancellation, and
+        listeners notified of every improved incumbent.
+
+        :param t: time budget in seconds, None for no deadline
+
+        :return: None
+        """
+        self.deadline = None if t is None else time.time() + t
+        self.cancelled = False
+        self.listeners = []  # callables (candidate, fitness)
+        self.best = None  # best incumbent reported so far
+        self.fitness = math.inf
+
+    def expired(self):
+        """
+        Check if the engine should stop.
+
+        :return: True once cancelled or past the deadline
+        """
+        return self.cancelled or (self.deadline is not None and time.time() > self.deadline)
+
+    def cancel(self):
+        """
+        Ask the engine to stop, it returns its best solution so far.
+
+        :return: None
+        """
+        self.cancelled = True
+
+    def extend(self, seconds):
+        """
+        Move the deadline.
+
+        :param seconds: extra time
+
+        :return: None
+        """
+        if self.deadline is not None:
+            self.deadline += seconds
+
+    def improved(self, candidate, fitness):
+        """
+        Report an incumbent, listeners are only notified if it beats every earlier one.
+
+        :param candidate: candidate
+        :param fitness: candidate fitness
+
+        :return: None
+        """
+        if fitness < self.fitness:
+            self.best = candidate
+            self.fitness = fitness
+            for listener in self.listeners:
+                listener(candidate, fitness)
+
+
+class SolveHandle:
+    def __init__(self, control, future, queue):
+        """
+        Handle of a solve running in the background. Iterate over it with async for to receive every improved
+        incumbent as (candidate, fitness, seconds since the start).
+
+        :param control: Control of the run
+        :param future: asyncio future of the run, resolving to (best, fitness, time, log)
+        :param queue: asyncio queue of improvements, None marks the end
+
+        :return: None
+        """
+        self.control = control
+        self.future = future
+        self.queue = queue
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await self.queue.get()
+        if item is None:
+            self.queue.put_nowait(None)  # iterating again ends at once
+            raise StopAsyncIteration
+        return item
+
+    @property
+    def best(self):
+        return self.control.best
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """
+        Stop the run, result() then returns the best solution so far.
+
+        :return: None
+        """
+        self.control.cancel()
+
+    def extend(self, seconds):
+        """
+        Extend the deadline of the run.
+
+        :param seconds: extra time
+
+        :return: None
+        """
+        self.control.extend(seconds)
+
+    async def result(self):
+        """
+        Wait for the run to finish.
+
+        :return: the best solution, fitness, time elapsed (in seconds), log
+        """
+        return await self.future
+
+
+async def solve(cp, engine="evo", t=10, executor=None, **kwargs):
+    """
+    Start a solve of a cutting problem in a background executor and return at once. The final result is improved
+    by local search in the executor, then kept by the cutting problem (incumbent, cache) on the loop's thread.
+
+    :param cp: Cutting_Problem
+    :param engine: "rs", "evo", "aco" or "cg"
+    :param t: wall-clock budget in seconds, can be extended through the handle
+    :param executor: concurrent.futures executor, the loop's default thread pool if None
+    :param kwargs: other keyword arguments of the engine's run method, its own time limit is ignored: the deadline
+        only comes from t
+
+    :return: SolveHandle
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    control = Control(t)
+    start_time = time.time()
+    control.listeners.append(lambda c, f: loop.call_soon_threadsafe(queue.put_nowait,
+                                                                     (c, f, time.time() - start_time)))
+    options = dict(kwargs, t=math.inf)  # the engine runs until the control's deadline or cancellation
+    runs = {"rs": lambda: cp.rs.run(**dict({"iterations": 10**9}, **options)),
+            "evo": lambda: cp.evo.run(**dict({"iterations": 10**9}, **options)),
+            "aco": lambda: cp.aco.run(**dict({"cycles": 10**9}, **options)),
+            "cg": lambda: cp.cg.run(**options)}
+    if engine not in runs:
+        raise ValueError("Unknown engine: {}".format(engine))
+
+    def run():
+        for x in cp.pipe:
+            x.set_control(control)
+        try:
+            best, fitness, elapsed, log = runs[engine]()
+            best, fitness = cp.improve(best, fitness)  # local search stays off the loop
+            return best, fitness, elapsed, log
+        finally:
+            for x in cp.pipe:
+                x.set_control(Control())
+
+    async def finish():
+        try:
+            best, fitness, elapsed, log = await loop.run_in_executor(executor, run)
+            cp.keep(best, fitness)  # on the loop thread, the cache connection belongs to it
+            control.improved(best, fitness)
+            return best, fitness, elapsed, log
+        finally:
+            loop.call_soon(queue.put_nowait, None)  # after every improvement already scheduled
+
+    future = asyncio.ensure_future(finish())
+    return SolveHandle(control, future, queue)
@@ -0,0 +1,226 @@
+import argparse
+import csv
+import json
+import math
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, as_completed, FIRST_COMPLETED
+import numpy as np
+from random_search import RandomSearch
+from evo import EVO
+from aco import ACO
+from column_generation import ColumnGeneration
+from bounds import cost_per_length_bound, l2_bound, optimality_gap
+from cases import check_case
+from cache import SolutionCache
+from instrument import Instruments, QUIET
+from anytime import Control
+
+ENGINES = ["rs", "evo", "aco", "cg"]
+FIELDS = ["id", "engine", "status", "fitness", "bound", "gap", "time", "solution"]  # result columns
+
+MAX_ENGINES = 4  # stock catalogues whose engines a process keeps
+
+_engines = OrderedDict()  # engines of this process per stock catalogue, reused across jobs, least recently used first
+_caches = {}  # open caches of this process per file
+
+
+def read_jobs(path):
+    """
+    Stream problems from a JSONL file (one case dictionary per line) or a CSV file (columns id, l, c, rl, q and
+    optionally engine, t, seed, lists separated by spaces).
+
+    :param path: input file
+
+    :return: generator of job dictionaries
+    """
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            for n, row in enumerate(csv.DictReader(f)):
+                job = {key: value for key, value in row.items() if value not in (None, "")}
+                for key in ("l", "rl", "q"):
+                    job[key] = [int(v) for v in job.get(key, "").split()]
+                job["c"] = [float(v) if "." in v else int(v) for v in job.get("c", "").split()]
+                for key in ("t", "seed"):
+                    if key in job:
+                        job[key] = float(job[key]) if key == "t" else int(job[key])
+                job.setdefault("id", n)
+                yield job
+        else:
+            for n, line in enumerate(f):
+                if line.strip():
+                    job = json.loads(line)
+                    job.setdefault("id", n)
+                    yield job
+
+
+class ResultWriter:
+    def __init__(self, path):
+        """
+        Write results as they come, as JSONL or CSV depending on the file extension.
+
+        :param path: output file
+
+        :return: None
+        """
+        self.file = open(path, "w", newline="")
+        self.csv = csv.DictWriter(self.file, FIELDS) if path.endswith(".csv") else None
+        if self.csv is not None:
+            self.csv.writeheader()
+
+    def write(self, result):
+        """
+        Write and flush one result.
+
+        :param result: result dictionary
+
+        :return: None
+        """
+        if self.csv is not None:
+            self.csv.writerow(dict(result, solution=json.dumps(result["solution"])))
+        else:
+            self.file.write(json.dumps(result) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def solve_job(job, engine, t, seed, cache=None):
+    """
+    Solve one problem. The engines are built once per stock catalogue in every process and only get the new
+    orders, bounds and seed for every job. Every process keeps the engines of the MAX_ENGINES most recently used
+    catalogues. With a cache, repeated problems are answered from it, and EVO and ACO
+    start from the cached patterns.
+
+    :param job: job dictionary with the case keys "l", "c", "rl", "q"
+    :param engine: "rs", "evo", "aco" or "cg"
+    :param t: time budget in seconds, counted from the start of the job; every engine stops once it is spent
+    :param seed: random seed
+    :param cache: pattern and solution cache file, None disables caching
+
+    :return: result dictionary
+    """
+    start_time = time.time()
+    result = {"id": job["id"], "engine": engine, "status": "ok", "fitness": None, "bound": None, "gap": None,
+              "time": None, "solution": None}
+    try:
+        check_case(job)
+        stocks = dict(zip(job["l"], job["c"]))
+        orders = dict(zip(job["rl"], job["q"]))
+        key = tuple(sorted(stocks.items()))
+        if key in _engines:
+            _engines.move_to_end(key)
+        else:
+            rs = RandomSearch(stocks, None)
+            evo = EVO(stocks, None, rs)
+            aco = ACO(stocks, None, rs, evo)
+            cg = ColumnGeneration(stocks, None, rs)
+            _engines[key] = (rs, evo, aco, cg)
+            if len(_engines) > MAX_ENGINES:
+                _engines.popitem(last=False)
+        rs, evo, aco, cg = _engines[key]
+        streams = np.random.SeedSequence(seed).spawn(4)  # one stream per engine
+        for x, s in zip((rs, evo, aco, cg), streams):
+            x.reseed(s)
+        bound = max(cost_per_length_bound(stocks, orders), l2_bound(stocks, orders))
+        if all(float(c).is_integer() for c in stocks.values()):  # integer costs, round the bound up
+            bound = math.ceil(bound - 1e-6)
+        if cache is not None and cache not in _caches:
+            _caches[cache] = SolutionCache(cache)
+        cache = _caches.get(cache)
+        best = cache.get_solution(stocks, orders) if cache is not None else None
+        if best is not None:
+            result.update(status="cached", fitness=best.cost, bound=bound, gap=optimality_gap(best.cost, bound),
+                          solution=[list(a) for a in best], time=time.time() - start_time)
+            return result
+        inst = Instruments(QUIET)
+        control = Control(t - (time.time() - start_time))  # the job's deadline, shared by every engine
+        for x in (rs, evo, aco, cg):
+            x.set_order(orders)
+            x.set_bound(bound)
+            x.set_instruments(inst)
+            x.set_control(control)
+        if engine == "rs":
+            best, fitness, elapsed, log = rs.run(t=t)
+        elif engine == "evo":
+            pop = cache.warm_start(rs, None, 500)[0] if cache is not None else None
+            best, fitness, elapsed, log = evo.run(pop=pop, t=t)
+        elif engine == "aco":
+            pop = cache.warm_start(rs, None, 100)[0] if cache is not None else None
+            trail = cache.pheromone(stocks, orders) if cache is not None else None
+            best, fitness, elapsed, log = aco.run(pop=pop, trail=trail, t=t)
+        elif engine == "cg":
+            best, fitness, elapsed, log = cg.run(t=t)
+        else:
+            raise ValueError("Unknown engine: {}".format(engine))
+        if cache is not None:
+            cache.put_solution(stocks, orders, best, fitness)
+        result.update(fitness=fitness, bound=bound, gap=optimality_gap(fitness, bound),
+                      solution=[list(a) for a in best])
+    except Exception as e:  # one bad problem must not stop the batch
+        result.update(status="error: {}".format(e))
+    result["time"] = time.time() - start_time
+    return result
+
+
+def run_batch(source, destination, engine="cg", t=10, workers=1, seed=0, cache=None):
+    """
+    Solve every problem of a JSONL/CSV file over a process pool, writing results in completion order. At most
+    2 * workers problems are read ahead, so memory stays bounded whatever the size of the input, and a slow
+    problem only holds its own worker.
+
+    :param source: input file
+    :param destination: output file, JSONL or CSV
+    :param engine: default engine, a job's "engine" overrides it
+    :param t: default time budget per problem in seconds, a job's "t" overrides it
+    :param workers: number of worker processes, 1 runs in this process
+    :param seed: root seed, a job without "seed" is seeded with seed + its line number
+    :param cache: pattern and solution cache file shared by the workers, None disables caching
+
+    :return: number of problems solved
+    """
+    writer = ResultWriter(destination)
+    jobs = read_jobs(source)
+    n = 0
+    try:
+        if workers <= 1:
+            for n, job in enumerate(jobs, 1):
+                writer.write(solve_job(job, job.get("engine", engine), job.get("t", t), job.get("seed", seed + n - 1),
+                                       cache))
+            return n
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for job in jobs:
+                pending.add(executor.submit(solve_job, job, job.get("engine", engine), job.get("t", t),
+                                            job.get("seed", seed + n), cache))
+                n += 1
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        writer.write(future.result())
+            for future in as_completed(pending):
+                writer.write(future.result())
+        return n
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cutting Stock Problem batch solver.")
+    parser.add_argument('source', type=str, help='JSONL or CSV file of problems')
+    parser.add_argument('destination', type=str, help='JSONL or CSV file of results')
+    parser.add_argument('--engine', type=str, help='Choose rs/evo/aco/cg', default="cg")
+    parser.add_argument('--t', type=float, help='Time budget per problem in seconds', default=10)
+    parser.add_argument('--workers', type=int, help='Number of worker processes', default=1)
+    parser.add_argument('--seed', type=int, help='Root seed', default=0)
+    parser.add_argument('--cache', type=str, help='Pattern and solution cache file, reused across runs')
+
+    args = parser.parse_args()
+
+    if args.engine not in ENGINES:
+        print(args.engine, " is not a valid choice.")
+        exit(1)
+    start = time.time()
+    n = run_batch(args.source, args.destination, args.engine, args.t, args.workers, args.seed, args.cache)
+    print("{} problems solved in {:.2f}s.".format(n, time.time() - start))
@@ -0,0 +1,258 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from cases import CASES, get_case
+from cutting_problem import Cutting_Problem
+from instrument import QUIET
+
+ENGINES = {  # fixed budget of every engine
+    "rs": {"iterations": 20, "population": 50, "t": 10},
+    "evo": {"population": 100, "iterations": 30, "t": 30},
+    "aco": {"population": 50, "cycles": 100},
+    "cg": {"t": 30},
+}
+
+
+def run_engine(cp, engine, budget):
+    """
+    Run one engine of a cutting problem.
+
+    :param cp: Cutting_Problem
+    :param engine: "rs", "evo", "aco" or "cg"
+    :param budget: keyword arguments of the engine's run method
+
+    :return: best solution, fitness, time elapsed, log
+    """
+    if engine == "rs":
+        return cp.rs.run(**budget)
+    if engine == "evo":
+        return cp.evo.run(**budget)
+    if engine == "aco":
+        return cp.aco.run(**budget)
+    if engine == "cg":
+        return cp.cg.run(**budget)
+    raise ValueError("Unknown engine: {}".format(engine))
+
+
+def benchmark(case_name, engine, seed, budget=None, target_gap=0.05, memory=False):
+    """
+    Run one engine on one case under a fixed seed and budget.
+
+    :param case_name: case name, see cases.get_case
+    :param engine: "rs", "evo", "aco" or "cg"
+    :param seed: random seed
+    :param budget: keyword arguments of the engine's run method, ENGINES[engine] if None
+    :param target_gap: the target is the known optimum, or the best lower bound raised by this relative gap
+    :param memory: trace the peak memory of the run with tracemalloc (slows the run down)
+
+    :return: result dictionary
+    """
+    case = get_case(case_name)
+    cp = Cutting_Problem(case, seed=seed, verbosity=QUIET)
+    bound = max(cp.lower_bounds().values())
+    target = case.get("optimum", bound * (1 + target_gap))
+    budget = ENGINES[engine] if budget is None else budget
+    if memory:
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+    cp.inst.reset()
+    best, fitness, elapsed, log = run_engine(cp, engine, budget)
+    report = cp.inst.report()
+    trace = log.trace  # best cost against wall time, improvements only
+    peak = report["memory_peak_bytes"]
+    if memory:
+        peak["traced"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {"case": case_name,
+            "engine": engine,
+            "seed": seed,
+            "budget": budget,
+            "pieces": int(sum(case["q"])),
+            "best": fitness,
+            "bound": bound,
+            "target": target,
+            "time": elapsed,
+            "time_to_target": next((t for t, f in trace if f <= target + 1e-9), None),
+            "trace": trace,
+            "candidates": report["counters"].get("candidates", 0),
+            "candidates_per_second": report["counters"].get("candidates", 0) / elapsed if elapsed > 0 else 0.0,
+            "peak_memory_bytes": peak}
+
+
+def run_suite(cases, engines, seeds, out=None, memory=False):
+    """
+    Run every engine on every case under every seed.
+
+    :param cases: array of case names
+    :param engines: array of engine names
+    :param seeds: array of seeds
+    :param out: JSON file the results are written to, None skips writing
+    :param memory: trace peak memory with tracemalloc
+
+    :return: results dictionary
+    """
+    results = {"meta": {"python": platform.python_version(),
+                        "numpy": np.__version__,
+                        "machine": platform.machine(),
+                        "date": time.strftime("%Y-%m-%dT%H:%M:%S")},
+               "results": []}
+    for case_name in cases:
+        for engine in engines:
+            for seed in seeds:
+                r = benchmark(case_name, engine, seed, memory=memory)
+                print("{:>8} {:>4} seed {:<4} best {:<10} time {:7.2f}s to target {} candidates/s {:.0f}".format(
+                    case_name, engine, seed, r["best"], r["time"],
+                    "-" if r["time_to_target"] is None else "{:.2f}s".format(r["time_to_target"]),
+                    r["candidates_per_second"]))
+                results["results"].append(r)
+    if out is not None:
+        with open(out, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def solution_errors(cp, candidate):
+    """
+    Check a solution against the current orders of a cutting problem.
+
+    :param cp: Cutting_Problem
+    :param candidate: solution
+
+    :return: array of error messages, empty if the solution is valid
+    """
+    errors = []
+    pieces = sorted(rl for a in candidate for rl in a[1:])
+    if pieces != sorted(rl for rl, q in cp.orders.items() for i in range(q)):
+        errors.append("pieces cut differ from the orders")
+    if any(a[0] not in cp.stocks or sum(a[1:]) > a[0] for a in candidate):
+        errors.append("an activity overfills or uses an unknown stock")
+    if abs(cp.rs.get_fitness(candidate) - sum(cp.stocks.get(a[0], 0) for a in candidate)) > 1e-9:
+        errors.append("fitness differs from the stock costs")
+    return errors
+
+
+def self_check(case_name="case3", seed=1):
+    """
+    Check the determinism claims and incumbent repair on one case: random search and parallel ACO give the same
+    result for one and two workers, an engine's result does not depend on the engines run before it, and a
+    repaired incumbent is a valid solution of the changed orders.
+
+    :param case_name: case name, see cases.get_case
+    :param seed: random seed
+
+    :return: array of failure messages, empty if every check passed
+    """
+    case = get_case(case_name)
+    failures = []
+
+    def fresh():
+        return Cutting_Problem(case, seed=seed, verbosity=QUIET)
+
+    def same(a, b):
+        return a[1] == b[1] and [list(x) for x in a[0]] == [list(x) for x in b[0]]
+
+    rs = [fresh().rs.run(iterations=4, population=50, t=600, workers=w, seed=seed) for w in (1, 2)]
+    if not same(*rs):
+        failures.append("rs: 1 and 2 workers differ ({} != {})".format(rs[0][1], rs[1][1]))
+    aco = [fresh().aco.run_parallel(population=40, cycles=20, ants=4, workers=w, seed=seed) for w in (1, 2)]
+    if not same(*aco):
+        failures.append("aco: 1 and 2 workers differ ({} != {})".format(aco[0][1], aco[1][1]))
+
+    alone = fresh().evo.run(population=50, iterations=10)
+    cp = fresh()
+    cp.rs.run(iterations=2, population=50)
+    after = cp.evo.run(population=50, iterations=10)
+    if not same(alone, after):
+        failures.append("evo: result depends on an earlier rs run ({} != {})".format(alone[1], after[1]))
+
+    for name, result in (("rs", rs[0]), ("aco", aco[0]), ("evo", alone)):
+        failures += ["{}: {}".format(name, e) for e in solution_errors(cp, result[0])]
+    cp.remember(after[0], after[1])
+    lengths = sorted(cp.orders)
+    changes = {lengths[0]: 0, lengths[1]: cp.orders[lengths[1]] + 3, lengths[-1]: max(1, cp.orders[lengths[-1]] // 2)}
+    cp.update_orders(changes)
+    failures += ["repair: {}".format(e) for e in solution_errors(cp, cp.incumbent)]
+    return failures
+
+
+def compare(old, new, tolerance=0.25, min_time=0.05):
+    """
+    Flag regressions between two result files, matching runs by case, engine and seed. A run regresses if its
+    best cost is higher, if it no longer reaches the target, or if its time to target or candidates per second
+    got worse by more than the tolerance. Differences in time to target under min_time are ignored as noise.
+
+    :param old: baseline results dictionary
+    :param new: new results dictionary
+    :param tolerance: accepted relative slow down
+    :param min_time: smallest time to target difference reported, in seconds
+
+    :return: array of regression messages
+    """
+    baseline = {(r["case"], r["engine"], r["seed"]): r for r in old["results"]}
+    regressions = []
+    for r in new["results"]:
+        key = (r["case"], r["engine"], r["seed"])
+        if key not in baseline:
+            continue
+        b = baseline[key]
+        name = "{} {} seed {}".format(*key)
+        if r["best"] > b["best"] + 1e-9:
+            regressions.append("{}: best cost {} -> {}".format(name, b["best"], r["best"]))
+        if b["time_to_target"] is not None:
+            if r["time_to_target"] is None:
+                regressions.append("{}: target no longer reached".format(name))
+            elif r["time_to_target"] > max(b["time_to_target"] * (1 + tolerance), b["time_to_target"] + min_time):
+                regressions.append("{}: time to target {:.3f}s -> {:.3f}s".format(name, b["time_to_target"],
+                                                                                 r["time_to_target"]))
+        if r["candidates_per_second"] < b["candidates_per_second"] * (1 - tolerance):
+            regressions.append("{}: candidates/s {:.1f} -> {:.1f}".format(name, b["candidates_per_second"],
+                                                                          r["candidates_per_second"]))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Cutting Stock Problem benchmark.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark suite")
+    run.add_argument('--cases', type=str, help='Comma separated case names, e.g. case3,u1000,t501',
+                     default=",".join(CASES) + ",u1000,t501")
+    run.add_argument('--engines', type=str, help='Comma separated engines', default=",".join(ENGINES))
+    run.add_argument('--seeds', type=str, help='Comma separated seeds', default="1,2,3")
+    run.add_argument('--out', type=str, help='JSON result file', default="benchmark.json")
+    run.add_argument('--memory', action='store_true', help='Trace peak memory with tracemalloc')
+
+    cmp = sub.add_parser("compare", help="Flag regressions between two result files")
+    cmp.add_argument('old', type=str, help='Baseline JSON result file')
+    cmp.add_argument('new', type=str, help='New JSON result file')
+    cmp.add_argument('--tolerance', type=float, help='Accepted relative slow down', default=0.25)
+
+    chk = sub.add_parser("check", help="Check determinism across workers and engines, and incumbent repair")
+    chk.add_argument('--case', type=str, help='Case name', default="case3")
+    chk.add_argument('--seed', type=int, help='Random seed', default=1)
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_suite(args.cases.split(","), args.engines.split(","), [int(s) for s in args.seeds.split(",")],
+                  out=args.out, memory=args.memory)
+    elif args.command == "check":
+        failures = self_check(args.case, args.seed)
+        for message in failures:
+            print("FAILED", message)
+        print("{} failures.".format(len(failures)))
+        sys.exit(1 if failures else 0)
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        regressions = compare(old, new, args.tolerance)
+        for message in regressions:
+            print("REGRESSION", message)
+        print("{} regressions.".format(len(regressions)))
+        sys.exit(1 if regressions else 0)
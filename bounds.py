@@ -0,0 +1,73 @@
+import math
+import numpy as np
+
+
+def cost_per_length_bound(stocks, orders):
+    """
+    Every requested length bought at the cheapest cost per unit length.
+
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+
+    :return: lower bound of the total cost
+    """
+    if not stocks:
+        return 0
+    return sum(rl * q for rl, q in orders.items()) * min(c / l for l, c in stocks.items())
+
+
+def l2_bound(stocks, orders):
+    """
+    Martello-Toth L2 bound on the number of bars of the longest stock length, times the cheapest stock cost.
+
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+
+    :return: lower bound of the total cost
+    """
+    if not stocks:
+        return 0
+    capacity = max(stocks.keys())
+    sizes = np.array(sorted(rl for rl, q in orders.items() if q > 0), dtype=float)
+    counts = np.array([orders[rl] for rl in sorted(orders.keys()) if orders[rl] > 0], dtype=float)
+    if len(sizes) == 0:
+        return 0
+    bars = 0
+    for k in [0.0] + [w for w in sizes.tolist() if w <= capacity / 2]:
+        j1 = sizes > capacity - k
+        j2 = (sizes <= capacity - k) & (sizes > capacity / 2)
+        j3 = (sizes <= capacity / 2) & (sizes >= k)
+        n2 = counts[j2].sum()
+        spare = n2 * capacity - (sizes[j2] * counts[j2]).sum()  # room left in the bars of J2
+        extra = math.ceil(((sizes[j3] * counts[j3]).sum() - spare) / capacity - 1e-9)
+        bars = max(bars, counts[j1].sum() + n2 + max(0, extra))
+    return int(bars) * min(stocks.values())
+
+
+def optimality_gap(fitness, bound):
+    """
+    Relative gap between a solution and a lower bound.
+
+    :param fitness: solution fitness
+    :param bound: lower bound
+
+    :return: gap, 0 means the solution is provably optimal
+    """
+    if fitness <= 0:
+        return 0.0
+    return max(0.0, (fitness - bound) / fitness)
+
+
+def gap_closed(fitness, bound, tolerance=0.0):
+    """
+    Check if a solution is within the tolerance of a lower bound.
+
+    :param fitness: solution fitness
+    :param bound: lower bound, None when unknown
+    :param tolerance: accepted relative gap
+
+    :return: True or False
+    """
+    if bound is None:
+        return False
+    return optimality_gap(fitness, bound) <= tolerance + 1e-12
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import sqlite3
+import time
+from candidate import Candidate, patterns_of
+from pheromone import Pheromone
+
+
+def catalogue_key(stocks):
+    """
+    Canonical hash of a stock catalogue.
+
+    :param stocks: dictionary of stocks
+
+    :return: hex digest
+    """
+    return hashlib.sha1(json.dumps(sorted(stocks.items())).encode()).hexdigest()
+
+
+def problem_key(stocks, orders):
+    """
+    Canonical hash of a problem, its catalogue and its orders.
+
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+
+    :return: hex digest
+    """
+    orders = sorted((rl, q) for rl, q in orders.items() if q > 0)
+    return hashlib.sha1(json.dumps([catalogue_key(stocks), orders]).encode()).hexdigest()
+
+
+class SolutionCache:
+    def __init__(self, path, max_patterns=20000, max_solutions=2000):
+        """
+        On-disk cache of cutting patterns per stock catalogue and of best solutions per problem, in SQLite.
+        Both tables are bounded and evict the least recently used entries.
+
+        :param path: database file
+        :param max_patterns: maximum number of patterns kept
+        :param max_solutions: maximum number of solutions kept
+
+        :return: None
+        """
+        self.path = path
+        self.max_patterns = max_patterns
+        self.max_solutions = max_solutions
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("CREATE TABLE IF NOT EXISTS patterns (catalogue TEXT, l REAL, rl TEXT, weight REAL, "
+                        "used REAL, PRIMARY KEY (catalogue, l, rl))")
+        self.db.execute("CREATE TABLE IF NOT EXISTS solutions (problem TEXT PRIMARY KEY, fitness REAL, "
+                        "solution TEXT, used REAL)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get_solution(self, stocks, orders):
+        """
+        Best known solution of a problem.
+
+        :param stocks: dictionary of stocks
+        :param orders: dictionary of orders
+
+        :return: candidate, None when the problem was never solved
+        """
+        key = problem_key(stocks, orders)
+        row = self.db.execute("SELECT fitness, solution FROM solutions WHERE problem = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE solutions SET used = ? WHERE problem = ?", (time.time(), key))
+        self.db.commit()
+        cost = int(row[0]) if float(row[0]).is_integer() else row[0]
+        return Candidate(json.loads(row[1]), cost)
+
+    def put_solution(self, stocks, orders, candidate, fitness):
+        """
+        Remember a solution of a problem, if better than the known one, and learn its patterns.
+
+        :param stocks: dictionary of stocks
+        :param orders: dictionary of orders
+        :param candidate: solution
+        :param fitness: solution fitness
+
+        :return: None
+        """
+        key = problem_key(stocks, orders)
+        row = self.db.execute("SELECT fitness FROM solutions WHERE problem = ?", (key,)).fetchone()
+        if row is None or fitness < row[0]:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)",
+                            (key, fitness, json.dumps([list(a) for a in candidate]), time.time()))
+            self.db.execute("DELETE FROM solutions WHERE problem NOT IN "
+                            "(SELECT problem FROM solutions ORDER BY used DESC LIMIT ?)", (self.max_solutions,))
+        self.add_patterns(stocks, candidate)
+
+    def add_patterns(self, stocks, candidate, weight=1):
+        """
+        Learn the patterns of a good candidate, every use adds weight to a pattern.
+
+        :param stocks: dictionary of stocks
+        :param candidate: array of activities
+        :param weight: weight added per use
+
+        :return: None
+        """
+        catalogue = catalogue_key(stocks)
+        now = time.time()
+        for (l, rl_tuple), n in patterns_of(candidate).items():
+            self.db.execute("INSERT INTO patterns VALUES (?, ?, ?, ?, ?) ON CONFLICT (catalogue, l, rl) DO UPDATE "
+                            "SET weight = weight + excluded.weight, used = excluded.used",
+                            (catalogue, l, json.dumps(rl_tuple), weight * n, now))
+        self.db.execute("DELETE FROM patterns WHERE rowid NOT IN "
+                        "(SELECT rowid FROM patterns ORDER BY used DESC LIMIT ?)", (self.max_patterns,))
+        self.db.commit()
+
+    def patterns(self, stocks, orders):
+        """
+        Cached patterns of a catalogue that fit the orders, heaviest first.
+
+        :param stocks: dictionary of stocks
+        :param orders: dictionary of orders
+
+        :return: array of (l, rl tuple, weight)
+        """
+        catalogue = catalogue_key(stocks)
+        found = []
+        rows = []  # rowids of the patterns found
+        for row, l, rl, weight in self.db.execute("SELECT rowid, l, rl, weight FROM patterns WHERE catalogue = ? "
+                                                  "ORDER BY weight DESC", (catalogue,)):
+            rl_tuple = tuple((r, n) for r, n in json.loads(rl))
+            l = int(l) if float(l).is_integer() and int(l) in stocks else l
+            if l in stocks and all(orders.get(r, 0) >= n for r, n in rl_tuple):
+                found.append((l, rl_tuple, weight))
+                rows.append(row)
+        if found:
+            now = time.time()
+            self.db.executemany("UPDATE patterns SET used = ? WHERE rowid = ?", ((now, row) for row in rows))
+            self.db.commit()
+        return found
+
+    def pheromone(self, stocks, orders):
+        """
+        Pheromone trail laid on the cached patterns fitting the orders.
+
+        :param stocks: dictionary of stocks
+        :param orders: dictionary of orders
+
+        :return: Pheromone
+        """
+        trail = Pheromone(stocks)
+        for l, rl_tuple, weight in self.patterns(stocks, orders):
+            trail.deposit(l, rl_tuple, weight)
+        return trail
+
+    def warm_population(self, rs, n):
+        """
+        Candidates built from the cached patterns: patterns are taken in a weighted random order, each as many
+        times as it fits the remaining orders, and the rest is filled randomly.
+
+        :param rs: random search model, set to the orders
+        :param n: number of candidates
+
+        :return: array of candidates, empty if no pattern fits
+        """
+        patterns = self.patterns(rs.stocks, rs.orders)
+        if not patterns:
+            return []
+        pop = []
+        for i in range(n):
+            draw = rs.stream.random
+            order = sorted(patterns, key=lambda p: -draw() ** (1 / p[2]))  # weighted shuffle
+            c = rs.new_candidate()
+            orders = rs.ledger.copy()
+            for l, rl_tuple, weight in order:
+                repeats = orders.repeats(rl_tuple)
+                c.add_pattern(l, rl_tuple, repeats, rs.stocks[l])
+                orders.subtract_pattern(rl_tuple, repeats)
+            pop.append(rs.fill_candidate(orders, c, rng=rs.stream))
+        return pop
+
+    def warm_start(self, rs, pop, population):
+        """
+        Replace up to half of a population with candidates built from the cached patterns.
+
+        :param rs: random search model, set to the orders
+        :param pop: population, a random one if None
+        :param population: population size
+
+        :return: population, and the number of cached candidates in it
+        """
+        warm = self.warm_population(rs, population // 2)
+        if not warm:
+            return pop, 0
+        if pop is None:
+            pop = rs.initial_candidates(population)
+        return warm + list(pop[len(warm):]), len(warm)
@@ -0,0 +1,345 @@
+import numpy as np
+from collections import OrderedDict
+
+MASK = (1 << 64) - 1  # keys are 64-bit
+
+
+class Candidate(list):
+    def __init__(self, activities=(), cost=0, key=None):
+        """
+        A candidate solution, an array of activities carrying its own total cost and canonical key.
+
+        :param activities: array of activities
+        :param cost: total cost of the activities
+        :param key: canonical key of the activities, computed on first use if None
+
+        :return: None
+        """
+        super().__init__(activities)
+        self.cost = cost
+        self._key = key
+
+    @property
+    def key(self):
+        """
+        Canonical key, the same for candidates cutting the same multiset of patterns whatever the order of their
+        activities and of the pieces within them. Computed once, then kept up to date as activities are added.
+
+        :return: 64-bit key
+        """
+        if self._key is None:
+            self._key = candidate_key(self)
+        return self._key
+
+    def add(self, a, cost):
+        """
+        Append an activity and add its cost.
+
+        :param a: activity
+        :param cost: cost of the activity's stock length
+
+        :return: None
+        """
+        self.append(a)
+        self.cost += cost
+        if self._key is not None:
+            self._key = (self._key + activity_hash(a)) & MASK
+
+    def add_pattern(self, l, rl_tuple, n, cost):
+        """
+        Append n activities cutting the same pattern and add their cost.
+
+        :param l: stock length
+        :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+        :param n: number of bars
+        :param cost: cost of the stock length
+
+        :return: None
+        """
+        a = activity_of(l, rl_tuple)
+        for i in range(n):
+            self.append(list(a))
+        self.cost += n * cost
+        if self._key is not None:
+            self._key = (self._key + n * pattern_hash(l, rl_tuple)) & MASK
+
+
+class PatternCandidate:
+    def __init__(self, patterns=None, cost=0):
+        """
+        A candidate solution held as cutting patterns with repeat counts, {(l, rl tuple): bars}, carrying its own
+        total cost. Memory and the cost of every operation grow with the number of distinct patterns, not with the
+        number of pieces. Iterating yields the activities one bar at a time, as for a Candidate.
+
+        :param patterns: dictionary {(l, rl tuple): number of bars}
+        :param cost: total cost of the bars
+
+        :return: None
+        """
+        self.patterns = dict(patterns or {})
+        self.cost = cost
+        self._key = None
+
+    def __len__(self):
+        return sum(self.patterns.values())
+
+    def __iter__(self):
+        for (l, rl_tuple), n in self.patterns.items():
+            a = activity_of(l, rl_tuple)
+            for i in range(n):
+                yield list(a)
+
+    def __repr__(self):
+        return "[" + ", ".join("{} x {}".format(n, activity_of(l, rl_tuple))
+                               for (l, rl_tuple), n in self.patterns.items()) + "]"
+
+    @property
+    def key(self):
+        """
+        Canonical key, equal to the key of a Candidate cutting the same bars.
+
+        :return: 64-bit key
+        """
+        if self._key is None:
+            self._key = candidate_key(self)
+        return self._key
+
+    def add(self, a, cost):
+        """
+        Add one activity and its cost.
+
+        :param a: activity
+        :param cost: cost of the activity's stock length
+
+        :return: None
+        """
+        self.add_pattern(*pattern_of(a), 1, cost)
+
+    def add_pattern(self, l, rl_tuple, n, cost):
+        """
+        Add n bars cutting the same pattern and their cost.
+
+        :param l: stock length
+        :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+        :param n: number of bars
+        :param cost: cost of the stock length
+
+        :return: None
+        """
+        if n > 0:
+            key = (l, rl_tuple)
+            self.patterns[key] = self.patterns.get(key, 0) + n
+            self.cost += n * cost
+            if self._key is not None:
+                self._key = (self._key + n * pattern_hash(l, rl_tuple)) & MASK
+
+    def sample(self, p, generator, stocks):
+        """
+        Random subset of the bars, every bar kept with probability p. One binomial draw per pattern.
+
+        :param p: probability of keeping a bar
+        :param generator: numpy random Generator
+        :param stocks: dictionary of stocks
+
+        :return: PatternCandidate
+        """
+        keys = list(self.patterns)
+        kept = generator.binomial(np.array([self.patterns[key] for key in keys], dtype=np.int64), p).tolist()
+        subset = PatternCandidate()
+        for (l, rl_tuple), n in zip(keys, kept):
+            subset.add_pattern(l, rl_tuple, n, stocks[l])
+        return subset
+
+
+def pattern_of(a):
+    """
+    Pattern of an activity, in the pheromone format.
+
+    :param a: activity [l, rl...]
+
+    :return: stock length, sorted ((rl, count), ...) tuple
+    """
+    rl_counter = {}
+    for rl in a[1:]:
+        rl_counter[rl] = rl_counter.get(rl, 0) + 1
+    return a[0], tuple(sorted(rl_counter.items()))
+
+
+def activity_of(l, rl_tuple):
+    """
+    Activity cutting a pattern.
+
+    :param l: stock length
+    :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+
+    :return: activity [l, rl...]
+    """
+    return [l] + [rl for rl, k in rl_tuple for i in range(k)]
+
+
+def patterns_of(candidate):
+    """
+    Patterns of a candidate with their number of bars.
+
+    :param candidate: Candidate, PatternCandidate or array of activities
+
+    :return: dictionary {(l, rl tuple): number of bars}
+    """
+    if isinstance(candidate, PatternCandidate):
+        return candidate.patterns
+    patterns = {}
+    for a in candidate:
+        key = pattern_of(a)
+        patterns[key] = patterns.get(key, 0) + 1
+    return patterns
+
+
+def _mix(x):
+    """
+    SplitMix64 finaliser, spreads the bits of an integer over 64 bits.
+
+    :param x: integer
+
+    :return: 64-bit integer
+    """
+    x = (x + 0x9E3779B97F4A7C15) & MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK
+    return x ^ (x >> 31)
+
+
+class _Mixed(dict):
+    def __missing__(self, rl):
+        h = self[rl] = _mix(rl)
+        return h
+
+
+_MIXED = _Mixed()  # mixed hash of every piece length seen
+
+
+def activity_hash(a):
+    """
+    Hash of an activity that ignores the order of its pieces: the pieces' mixed hashes are summed, then hashed
+    with the stock length.
+
+    :param a: activity [l, rl...]
+
+    :return: 64-bit integer
+    """
+    return hash((a[0], sum(map(_MIXED.__getitem__, a[1:])) & MASK)) & MASK
+
+
+def pattern_hash(l, rl_tuple):
+    """
+    Hash of a pattern, equal to the hash of the activity cutting it.
+
+    :param l: stock length
+    :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+
+    :return: 64-bit integer
+    """
+    return hash((l, sum(k * _MIXED[rl] for rl, k in rl_tuple) & MASK)) & MASK
+
+
+def candidate_key(candidate):
+    """
+    Canonical key of a candidate. A candidate is canonically the sorted multiset of its sorted activities, its key
+    sums the activity hashes so that it is computed in one pass without sorting and updated in O(1) per activity
+    added. Equal candidates have equal keys, distinct ones collide with probability about 2^-64.
+
+    :param candidate: Candidate, PatternCandidate or array of activities
+
+    :return: 64-bit key
+    """
+    if isinstance(candidate, PatternCandidate):
+        return sum(n * pattern_hash(l, rl_tuple) for (l, rl_tuple), n in candidate.patterns.items()) & MASK
+    return sum(map(activity_hash, candidate)) & MASK
+
+
+class CandidateMemo:
+    def __init__(self, capacity=1024):
+        """
+        Bounded memo of values computed for candidates, keyed by canonical key. The least recently used entry is
+        evicted once capacity is reached.
+
+        :param capacity: maximum number of entries
+
+        :return: None
+        """
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, candidate):
+        """
+        Value stored for a candidate, or for any candidate with the same canonical key.
+
+        :param candidate: Candidate or PatternCandidate
+
+        :return: value, None if unknown
+        """
+        value = self.entries.get(candidate.key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(candidate.key)
+        self.hits += 1
+        return value
+
+    def put(self, candidate, value):
+        """
+        Store a value for a candidate.
+
+        :param candidate: Candidate or PatternCandidate
+        :param value: value, not None
+
+        :return: None
+        """
+        self.entries[candidate.key] = value
+        self.entries.move_to_end(candidate.key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+
+class RunningStats:
+    def __init__(self, values=()):
+        """
+        Running mean and standard deviation (Welford), updated one value at a time.
+
+        :param values: initial values
+
+        :return: None
+        """
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        for x in values:
+            self.push(x)
+
+    def push(self, x):
+        """
+        Add a value.
+
+        :param x: value
+
+        :return: None
+        """
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        """
+        Population standard deviation, same as numpy.std.
+
+        :return: standard deviation
+        """
+        if self.n == 0:
+            return 0.0
+        return (max(self.m2, 0.0) / self.n) ** 0.5
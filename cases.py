@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import numpy as np
+
+CASES = {
+    "case1": {
+        "l": [10, 13, 15],  # stock lengths
+        "c": [100, 130, 150],  # stock costs
+        "rl": [3, 4, 5, 6, 7, 8, 9, 10],  # requested lengths
+        "q": [5, 2, 1, 2, 4, 2, 1, 3]  # requested quantities
+    },
+    "case2": {
+        "l": [50, 80, 100],  # stock lengths
+        "c": [100, 175, 250],  # stock costs
+        "rl": [20, 25, 30],  # requested lengths
+        "q": [2, 2, 4]  # requested quantities
+    },
+    "case3": {
+        "l": [4300, 4250, 4150, 3950, 3800, 3700, 3550, 3500],  # stock lengths
+        "c": [86, 85, 83, 79, 68, 66, 64, 63],  # stock costs
+        "rl": [2350, 2250, 2200, 2100, 2050, 2000, 1950, 1900, 1850, 1700, 1650, 1350, 1300, 1250, 1200, 1150, 1100,
+               1050],  # requested lengths
+        "q": [2, 4, 4, 15, 6, 11, 6, 15, 13, 5, 2, 9, 3, 6, 10, 4, 8, 3]  # requested quantities
+    },
+    "case4": {
+        "l": [120, 115, 110, 105, 100],  # stock lengths
+        "c": [12, 11.5, 11, 10.5, 10],  # stock costs
+        "rl": [21, 22, 24, 25, 27, 29, 30, 31, 32, 33, 34, 35, 38, 39, 42, 44, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54,
+               55, 56, 57, 59, 60, 61, 63, 65, 66, 67],  # requested lengths
+        "q": [13, 15, 7, 5, 9, 9, 3, 15, 18, 17, 4, 17, 20, 9, 4, 19, 4, 12, 15, 3, 20, 14, 15, 6, 4, 7, 5, 19, 19, 6,
+              3, 7, 20, 5, 10, 17]  # requested quantities
+    }
+}
+
+
+def aggregate(pieces):
+    """
+    Requested lengths and quantities of a list of pieces.
+
+    :param pieces: array of piece lengths
+
+    :return: requested lengths, requested quantities
+    """
+    rl, q = np.unique(np.asarray(pieces, dtype=np.int64), return_counts=True)
+    return rl[::-1].tolist(), q[::-1].tolist()
+
+
+def falkenauer_uniform(pieces=1000, capacity=150, low=20, high=100, stocks=1, seed=0):
+    """
+    Falkenauer "u" instance: piece lengths uniform in [low, high] cut from bars of length capacity.
+    With several stocks, shorter bars are added, each slightly cheaper per unit length than the next longer one.
+
+    :param pieces: number of pieces
+    :param capacity: longest stock length
+    :param low: shortest piece
+    :param high: longest piece
+    :param stocks: number of stock lengths
+    :param seed: random seed
+
+    :return: case dictionary
+    """
+    rng = np.random.default_rng(seed)
+    rl, q = aggregate(rng.integers(low, high + 1, size=pieces))
+    l = [capacity - 10 * k for k in range(stocks)]
+    c = [int(round(length * (1 - 0.02 * k))) for k, length in enumerate(l)]
+    return {"l": l, "c": c, "rl": rl, "q": q}
+
+
+def falkenauer_triplets(pieces=999, capacity=1000, seed=0):
+    """
+    Falkenauer "t" instance: every bar is filled exactly by three pieces, so the optimum uses pieces / 3 bars.
+
+    :param pieces: number of pieces, rounded down to a multiple of 3
+    :param capacity: stock length
+    :param seed: random seed
+
+    :return: case dictionary, with the known optimal cost under "optimum"
+    """
+    rng = np.random.default_rng(seed)
+    triplets = pieces // 3
+    first = rng.integers(capacity * 380 // 1000, capacity * 490 // 1000 + 1, size=triplets)
+    second = rng.integers(capacity * 250 // 1000, (capacity - first) // 2 + 1)
+    third = capacity - first - second
+    rl, q = aggregate(np.concatenate([first, second, third]))
+    return {"l": [capacity], "c": [capacity], "rl": rl, "q": q, "optimum": triplets * capacity}
+
+
+def get_case(name, seed=0):
+    """
+    Built-in case by name, or a synthetic one: "u<pieces>" (uniform) or "t<pieces>" (triplets), e.g. "u1000".
+
+    :param name: case name
+    :param seed: random seed of synthetic cases
+
+    :return: case dictionary
+    """
+    if name in CASES:
+        return CASES[name]
+    match = re.fullmatch(r"([ut])(\d+)", name)
+    if match is None:
+        raise ValueError("Unknown case: {}".format(name))
+    if match.group(1) == "u":
+        return falkenauer_uniform(int(match.group(2)), stocks=3, seed=seed)
+    return falkenauer_triplets(int(match.group(2)), seed=seed)
+
+
+def check_case(case):
+    """
+    Validate a problem definition.
+
+    :param case: case dictionary
+
+    :return: None, raises ValueError on an invalid definition
+    """
+    for key in ("l", "c", "rl", "q"):
+        if not case.get(key):
+            raise ValueError("Missing {}. Please revise the problem definition.".format(key))
+    if len(set(case["l"])) != len(case["l"]):
+        raise ValueError("Duplicated stock length. Please revise the problem definition.")
+    if len(case["l"]) != len(case["c"]):
+        raise ValueError("Unmatched stock lengths and costs. Please revise the problem definition.")
+    if len(case["rl"]) != len(case["q"]):
+        raise ValueError("Unmatched requested lengths and quantities. Please revise the problem definition.")
+    if max(case["rl"]) > max(case["l"]):
+        raise ValueError("Requested length exceeds the maximum stock length. Please revise the problem definition.")
+
+
+def load_case(source):
+    """
+    Problem definition from a JSON file, a case name (see get_case), or an inline definition such as
+    "l=10,13,15;c=100,130,150;rl=3,4,5;q=5,2,1".
+
+    :param source: file path, case name or inline definition
+
+    :return: validated case dictionary
+    """
+    if os.path.isfile(source):
+        with open(source) as f:
+            case = json.load(f)
+    elif "=" in source:
+        case = {}
+        for part in source.split(";"):
+            key, values = part.split("=")
+            case[key.strip()] = [int(v) if key.strip() != "c" else float(v) for v in values.split(",")]
+        if all(c.is_integer() for c in case.get("c", [])):
+            case["c"] = [int(c) for c in case["c"]]
+    else:
+        case = get_case(source)
+    check_case(case)
+    return case
@@ -0,0 +1,326 @@
+import time
+from math import gcd
+import numpy as np
+from candidate import pattern_of
+from ledger import OrderLedger
+from bounds import optimality_gap
+from random_stream import RandomStream
+from instrument import Instruments, timed, SUMMARY
+from anytime import Control
+
+
+class ColumnGeneration:
+    def __init__(self, stocks, rng, rs):
+        """
+        :param stocks: dictionary of stocks
+        :param rng: numpy random Generator of the engine, or a seed it is created from
+        :param rs: random search model
+
+        :return: None
+        """
+        self.stocks = stocks
+        self.generator = np.random.default_rng(rng)
+        self.stream = RandomStream(self.generator)  # draws of the fill fallback
+        self.rs = rs
+        self.orders = {}
+        self.ledger = OrderLedger(self.orders)
+        self.lengths = np.zeros(0, dtype=np.int64)  # requested lengths, sorted as in the ledger
+        self.unit = 1  # common divisor of all lengths, shrinks the knapsack capacity
+        self.lp_bound = None  # optimal value of the last LP relaxation, None if its pricing stopped early
+        self.bound = None  # lower bound of the problem
+        self.gap_tol = 0.0  # accepted optimality gap
+        self.inst = Instruments()  # timers, counters and verbosity
+        self.control = Control()  # deadline, cancellation and improvement listeners
+
+    """
+    Column generation (Gilmore-Gomory):
+        - Start from one homogeneous cutting pattern per requested length.
+        - Solve the LP master: cover every requested quantity with the cheapest combination of patterns.
+        - Price new patterns with a bounded knapsack over the LP duals, one per stock length, and add those with
+          negative reduced cost.
+        - Repeat until no pattern prices out, the LP optimum is then a lower bound of the problem. If pricing stops
+          early, the master's optimum is only an upper bound of the LP optimum; Farley's bound, the master's optimum
+          scaled by the lowest cost to pattern value ratio, is used instead.
+    Rounding:
+        - Use every pattern as many whole times as the LP solution allows, trimming pieces already covered.
+        - If nothing rounds down, use the pattern with the largest LP value once.
+        - Re-solve the column generation for the residual orders until every order is covered.
+    """
+    @timed("cg.run")
+    def run(self, t=60, max_columns=5000):
+        """
+        Runs column generation and rounds the LP solution into a candidate.
+
+        :param t: time
+        :param max_columns: maximum number of patterns in the master problem
+
+        :return: the best solution, fitness, time elapsed (in seconds)
+        """
+        self.inst.log(SUMMARY, "------------Column Generation------------")
+        log = self.inst.run_log("cg.run")
+        try:
+            start_time = time.time()
+            columns = self.initial_columns()
+            x, columns, lp_bound, converged = self.solve(self.ledger.counts(), columns, start_time + t, max_columns)
+            self.lp_bound = lp_bound if converged else None
+            if converged:
+                self.inst.log(SUMMARY, "LP bound: ", lp_bound)
+            else:
+                self.inst.log(SUMMARY, "Pricing stopped early, Farley bound: ", lp_bound)
+            best = self.round(x, columns, start_time + t, max_columns)
+            log.record(best, self.rs.get_fitness(best), time.time() - start_time)
+            self.control.improved(best, self.rs.get_fitness(best))
+            bound = lp_bound if self.bound is None else max(self.bound, lp_bound)
+            self.inst.log(SUMMARY, "Optimality gap: {:.2%}".format(optimality_gap(self.rs.get_fitness(best), bound)))
+            self.inst.log(SUMMARY, "------------Terminating------------")
+        finally:
+            log.close()
+        return best, self.rs.get_fitness(best), time.time() - start_time, log
+
+    def relaxation(self, t=10, max_columns=5000):
+        """
+        Lower bound of the problem from the LP relaxation: its optimal value, or Farley's bound if pricing stopped
+        early on the time or column limit.
+
+        :param t: time
+        :param max_columns: maximum number of patterns in the master problem
+
+        :return: LP bound
+        """
+        x, columns, bound, converged = self.solve(self.ledger.counts(), self.initial_columns(), time.time() + t,
+                                                  max_columns)
+        self.lp_bound = bound if converged else None
+        return bound
+
+    def set_bound(self, bound, gap_tol=0.0):
+        """
+        Set the lower bound used to report the optimality gap and stop once it closes.
+
+        :param bound: lower bound of the problem, None disables it
+        :param gap_tol: accepted relative gap
+
+        :return: None
+        """
+        self.bound = bound
+        self.gap_tol = gap_tol
+
+    def set_instruments(self, inst):
+        """
+        Set the instruments recording timers, counters and output verbosity.
+
+        :param inst: Instruments
+
+        :return: None
+        """
+        self.inst = inst
+
+    def set_control(self, control):
+        """
+        Set the run control: deadline, cancellation and improvement listeners.
+
+        :param control: Control
+
+        :return: None
+        """
+        self.control = control
+
+    def reseed(self, seed):
+        """
+        Restart the random stream from a seed.
+
+        :param seed: integer or SeedSequence
+
+        :return: None
+        """
+        self.generator = np.random.default_rng(seed)
+        self.stream = RandomStream(self.generator)
+
+    def set_order(self, orders):
+        """
+        Set order
+
+        :param orders: dictionary of orders
+
+        :return: None
+        """
+        self.orders = orders
+        self.ledger = OrderLedger(orders)
+        self.lengths = np.array(self.ledger.lengths, dtype=np.int64)
+        self.unit = 0
+        for length in list(self.stocks.keys()) + self.ledger.lengths:
+            self.unit = gcd(self.unit, int(length))
+        self.unit = max(self.unit, 1)
+
+    def initial_columns(self):
+        """
+        One homogeneous pattern per requested length, on the stock with the cheapest cost per piece. Lengths no
+        longer requested get no pattern.
+
+        :return: array of columns (l, pattern-count vector)
+        """
+        columns = []
+        for i, rl in enumerate(self.ledger.lengths):
+            if rl > max(self.stocks):
+                raise ValueError("Requested length {} exceeds every stock length.".format(rl))
+            if self.ledger.q[i] == 0:
+                continue
+            best = None
+            for l, c in self.stocks.items():
+                n = min(l // rl, self.ledger.q[i])
+                if n > 0 and (best is None or c / n < best[0]):
+                    best = (c / n, l, n)
+            pattern = np.zeros(len(self.lengths), dtype=np.int64)
+            pattern[i] = best[2]
+            columns.append((best[1], pattern))
+        return columns
+
+    def solve(self, demand, columns, deadline, max_columns):
+        """
+        Column generation for the given demand. When pricing stops before it converges, the master's optimum z only
+        bounds the LP optimum from above. The duals scaled by theta = min(1, min_l c_l / value_l) are then still
+        feasible, so theta * z is a valid lower bound (Farley's bound).
+
+        :param demand: numpy array of requested quantities
+        :param columns: array of starting columns (l, pattern-count vector)
+        :param deadline: time at which pricing stops, pricing also stops once the run is cancelled
+        :param max_columns: maximum number of columns
+
+        :return: LP solution, columns, lower bound of the LP optimum, True if pricing converged (the bound is then
+            the LP optimum)
+        """
+        keys = {(l, pattern.tobytes()) for l, pattern in columns}
+        while True:
+            res = self.master(demand, columns)
+            duals = -res.ineqlin.marginals  # shadow price of every requested length
+            added = 0
+            theta = 1.0  # lowest ratio of stock cost to best pattern value
+            for l, c in self.stocks.items():
+                pattern, value = self.price(l, duals, demand)
+                if value > c:
+                    theta = min(theta, c / value)
+                key = (l, pattern.tobytes())
+                if c - value < -1e-9 and key not in keys:  # negative reduced cost
+                    keys.add(key)
+                    columns.append((l, pattern))
+                    added += 1
+            if added == 0 or len(columns) >= max_columns or time.time() > deadline or self.control.expired():
+                bound = res.fun if added == 0 else theta * res.fun
+                if added:
+                    res = self.master(demand, columns)
+                return res.x, columns, bound, added == 0
+
+    @timed("master")
+    def master(self, demand, columns):
+        """
+        Solve the LP master problem, min cost such that every requested quantity is covered.
+
+        :param demand: numpy array of requested quantities
+        :param columns: array of columns (l, pattern-count vector)
+
+        :return: scipy OptimizeResult
+        """
+        from scipy.optimize import linprog  # imported on demand, scipy is slow to load
+        costs = np.array([self.stocks[l] for l, pattern in columns], dtype=float)
+        a = np.array([pattern for l, pattern in columns], dtype=float).T
+        res = linprog(costs, A_ub=-a, b_ub=-np.asarray(demand, dtype=float), bounds=(0, None), method="highs")
+        if res.status != 0:
+            raise RuntimeError("LP master problem failed: {}".format(res.message))
+        return res
+
+    @timed("pricing")
+    def price(self, l, duals, demand):
+        """
+        Bounded knapsack over the LP duals: the most valuable pattern fitting a stock length.
+
+        :param l: stock length
+        :param duals: dual value of every requested length
+        :param demand: numpy array of requested quantities, bounding each piece count
+
+        :return: pattern-count vector, dual value of the pattern
+        """
+        capacity = l // self.unit
+        weights = (self.lengths // self.unit).tolist()
+        items = []  # binary split of every bounded item, (position, multiplicity)
+        for i, w in enumerate(weights):
+            if duals[i] <= 1e-12 or w > capacity:
+                continue
+            bound = min(int(demand[i]), capacity // w)
+            k = 1
+            while bound > 0:
+                items.append((i, min(k, bound)))
+                bound -= min(k, bound)
+                k *= 2
+        dp = np.zeros(capacity + 1)  # best value with weight at most c
+        take = np.zeros((len(items), capacity + 1), dtype=bool)
+        for n, (i, m) in enumerate(items):
+            w = weights[i] * m
+            candidate = np.full(capacity + 1, -np.inf)
+            candidate[w:] = dp[:capacity + 1 - w] + duals[i] * m
+            take[n] = candidate > dp
+            dp = np.where(take[n], candidate, dp)
+        pattern = np.zeros(len(weights), dtype=np.int64)
+        c = capacity
+        for n in range(len(items) - 1, -1, -1):
+            if take[n, c]:
+                i, m = items[n]
+                pattern[i] += m
+                c -= weights[i] * m
+        return pattern, float(dp[capacity])
+
+    @timed("rounding")
+    def round(self, x, columns, deadline, max_columns):
+        """
+        Round an LP solution into a candidate, re-solving for the residual orders.
+
+        :param x: LP solution
+        :param columns: array of columns (l, pattern-count vector)
+        :param deadline: time at which pricing of residual problems stops
+        :param max_columns: maximum number of columns
+
+        :return: candidate
+        """
+        self.inst.count("candidates")
+        candidate = self.rs.new_candidate()
+        orders = self.ledger.copy()
+        while orders.total > 0:
+            remaining = orders.total
+            uses = np.floor(x + 1e-9).astype(np.int64)
+            if not uses.any():  # nothing rounds down, use the largest fraction once
+                uses[int(np.argmax(x))] = 1
+            for (l, pattern), n in zip(columns, uses.tolist()):
+                while n > 0:
+                    a = self.cut(pattern, orders)
+                    if len(a) == 1:  # nothing of the pattern is requested any more
+                        break
+                    l, rl_tuple = pattern_of(a)
+                    repeats = 0
+                    if len(a) - 1 == int(pattern.sum()):  # whole pattern, the next bars are cut the same way
+                        repeats = min(n - 1, orders.repeats(rl_tuple))
+                        orders.subtract_pattern(rl_tuple, repeats)
+                    candidate.add(a, self.stocks[l])
+                    candidate.add_pattern(l, rl_tuple, repeats, self.stocks[l])
+                    n -= 1 + repeats
+            if orders.total == remaining:  # no progress, fill the rest with the fill strategy
+                return self.rs.fill_candidate(orders, candidate, self.stream)
+            if orders.total > 0:
+                x, columns, bound, converged = self.solve(orders.counts(), columns, deadline, max_columns)
+        return candidate
+
+    def cut(self, pattern, orders):
+        """
+        Materialise a pattern as an activity, keeping only pieces still requested, on the cheapest stock it fits.
+
+        :param pattern: pattern-count vector
+        :param orders: remaining orders, consumed in place
+
+        :return: activity
+        """
+        pieces = []
+        for i in np.flatnonzero(pattern).tolist():
+            rl = self.ledger.lengths[i]
+            for k in range(min(int(pattern[i]), orders.q[i])):
+                pieces.append(rl)
+                orders.take(rl)
+        used = sum(pieces)
+        l = min((l for l in self.stocks.keys() if l >= used), key=lambda l: (self.stocks[l], l))
+        return [l] + sorted(pieces, reverse=True)
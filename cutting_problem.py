@@ -1,118 +1,377 @@
 import argparse
+import math
+import os
 import numpy as np
-import random
-import matplotlib.pyplot as plt
 from random_search import RandomSearch
 from aco import ACO
 from evo import EVO
+from column_generation import ColumnGeneration
+from bounds import cost_per_length_bound, l2_bound, gap_closed
+from instrument import Instruments, timed, SUMMARY, PROGRESS, TRACE
+from cases import check_case, load_case
+from cache import SolutionCache
 
 
 class Cutting_Problem():
-    def __init__(self, case, seed=None):
+    def __init__(self, case, seed=None, gap_tol=None, verbosity=TRACE, plots="show", cache=None, local_search=False):
         """
         Initiate a Cutting_Problem instance.
 
         :param case: array of stock lengths
         :param c: array of stock costs
-        :param seed: random seed
+        :param seed: root seed, every engine draws from its own stream spawned from it; fresh entropy if None
+        :param gap_tol: accepted optimality gap, engines stop once within it; None disables lower bounds
+        :param verbosity: output verbosity, from QUIET (0) to TRACE (3)
+        :param plots: "show" to plot interactively, a directory to save the plots to, None to skip plotting
+        :param cache: pattern and solution cache file, None disables caching
+        :param local_search: improve the best solution of every run by local search
         :return: None
         """
-        self.rng = random
-        if seed is not None:
-            self.rng.seed(seed)  # setting seed
+        self.seed = np.random.SeedSequence(seed)
+        streams = [np.random.default_rng(s) for s in self.seed.spawn(4)]  # one stream per engine
 
         self.stocks = dict(zip(case["l"], case["c"]))
         self.orders = dict(zip(case["rl"], case["q"]))
 
-        self.rs = RandomSearch(self.stocks, self.rng)
-        self.evo = EVO(self.stocks, self.rng, self.rs)
-        self.aco = ACO(self.stocks, self.rng, self.rs, self.evo)
-        self.pipe = [self.rs, self.evo, self.aco]
+        self.rs = RandomSearch(self.stocks, streams[0])
+        self.evo = EVO(self.stocks, streams[1], self.rs)
+        self.aco = ACO(self.stocks, streams[2], self.rs, self.evo)
+        self.cg = ColumnGeneration(self.stocks, streams[3], self.rs)
+        self.pipe = [self.rs, self.evo, self.aco, self.cg]
+        self.inst = Instruments(verbosity)  # timers, counters and verbosity shared by every engine
+        self.plots = plots
+        self.cache = SolutionCache(cache) if cache is not None else None
+        self.incumbent = None  # best solution of the current orders
+        self.local_search = local_search
 
         for x in self.pipe:
             x.set_order(self.orders)
+            x.set_instruments(self.inst)
 
-    def set_order(self, rl, q):
+        self.bounds = {}  # lower bounds by name
+        self.bound = None  # best lower bound
+        self.gap_tol = gap_tol
+        if gap_tol is not None:
+            self.set_bounds(gap_tol)
+
+    def set_order(self, rl, q, incremental=False):
         """
         Set order
 
         :param rl: array of requested lengths
         :param q: array of requested quantities
+        :param incremental: repair the incumbent into a solution of the new orders and keep the pheromone trail,
+            both warm start the next search; otherwise the next search starts from scratch
         :return: None
         """
         self.orders = dict(zip(rl, q))
         for x in self.pipe:
             x.set_order(self.orders)
+        if incremental and self.incumbent:
+            self.incumbent = self.evo.repair(self.incumbent)
+            self.inst.log(SUMMARY, "Repaired incumbent fitness: ", self.rs.get_fitness(self.incumbent))
+        else:
+            self.incumbent = None
+            self.aco.trail = None
+        if self.gap_tol is not None:
+            self.set_bounds(self.gap_tol)
+
+    def update_orders(self, changes):
+        """
+        Change some order lines incrementally, see set_order.
+
+        :param changes: dictionary {rl: new quantity}, a quantity of 0 removes the requested length
+        :return: None
+        """
+        orders = dict(self.orders)
+        for rl, q in changes.items():
+            if q > 0:
+                orders[rl] = q
+            else:
+                orders.pop(rl, None)
+        self.set_order(list(orders.keys()), list(orders.values()), incremental=True)
+
+    def lower_bounds(self, lp=True):
+        """
+        Lower bounds of the total cost.
+
+        :param lp: include the LP relaxation bound (column generation)
+        :return: dictionary of bounds {name: bound}
+        """
+        bounds = {"cost_per_length": cost_per_length_bound(self.stocks, self.orders),
+                  "l2": l2_bound(self.stocks, self.orders)}
+        if lp:
+            bounds["lp"] = self.cg.relaxation()
+        if all(float(c).is_integer() for c in self.stocks.values()):  # integer costs, round bounds up
+            bounds = {name: math.ceil(bound - 1e-6) for name, bound in bounds.items()}
+        return bounds
+
+    def set_bounds(self, gap_tol=0.0, lp=True):
+        """
+        Compute the lower bounds and hand the best one to every engine.
+
+        :param gap_tol: accepted optimality gap
+        :param lp: include the LP relaxation bound
+        :return: best lower bound
+        """
+        self.bounds = self.lower_bounds(lp)
+        self.bound = max(self.bounds.values())
+        self.gap_tol = gap_tol
+        for x in self.pipe:
+            x.set_bound(self.bound, gap_tol)
+        self.inst.log(SUMMARY, "Lower bound: ", self.bound, self.bounds)
+        return self.bound
+
+    def cached(self):
+        """
+        Best known solution of the problem from the cache, reported as the result and kept as the incumbent if it
+        is better.
+
+        :return: candidate, None on a cache miss
+        """
+        if self.cache is None:
+            return None
+        best = self.cache.get_solution(self.stocks, self.orders)
+        if best is not None:
+            self.inst.log(SUMMARY, "Cache hit.")
+            self.inst.log(SUMMARY, "Best solution: ", best)
+            self.inst.log(SUMMARY, "Fitness: ", self.rs.get_fitness(best))
+            if not self.incumbent or best.cost < self.rs.get_fitness(self.incumbent):
+                self.incumbent = best
+        return best
+
+    def warm_start(self, pop, population):
+        """
+        Replace up to half of the population with candidates built from the cached patterns, and the first
+        candidate with the incumbent.
+
+        :param pop: population, a random one if None
+        :param population: population size
+        :return: population
+        """
+        if self.cache is not None:
+            pop, n = self.cache.warm_start(self.rs, pop, population)
+            if n:
+                self.inst.log(SUMMARY, "Warm start from {} cached candidates.".format(n))
+        if self.incumbent:
+            if pop is None:
+                pop = self.rs.initial_candidates(population)
+            pop = [self.incumbent] + list(pop[1:])
+        return pop
+
+    def warm_trail(self):
+        """
+        Starting pheromone trail: the trail of the last ACO run, kept across incremental order changes, or one
+        laid on the cached patterns.
+
+        :return: Pheromone, None to start from an empty trail
+        """
+        if self.aco.trail is not None:
+            return self.aco.trail
+        if self.cache is not None:
+            return self.cache.pheromone(self.stocks, self.orders)
+        return None
+
+    def remember(self, best, fitness):
+        """
+        Improve a solution by local search if enabled, then keep it, see improve and keep.
+
+        :param best: solution
+        :param fitness: solution fitness
+        :return: solution, fitness
+        """
+        best, fitness = self.improve(best, fitness)
+        self.keep(best, fitness)
+        return best, fitness
+
+    def improve(self, best, fitness):
+        """
+        Improve a solution by local search if enabled.
 
-    def random_search(self, iterations=100, t=4, target=0, population=100):
-        best, fitness, time, log = self.rs.run(iterations=iterations, t=t, target=target, population=population)
-        print("Best solution: ", best)
-        print("Fitness: ", fitness)
-        print("Time elapsed: {}s".format(time))
-        self.plot_log(log)
+        :param best: solution
+        :param fitness: solution fitness
+        :return: solution, fitness
+        """
+        if self.local_search and best:
+            with self.inst.phase("local_search"):
+                best = self.evo.improve(best)
+            if self.rs.get_fitness(best) < fitness:
+                self.inst.log(SUMMARY, "Local search: {} -> {}".format(fitness, self.rs.get_fitness(best)))
+                fitness = self.rs.get_fitness(best)
+        return best, fitness
+
+    def keep(self, best, fitness):
+        """
+        Keep a solution as the incumbent if it is better, and store it and its patterns in the cache.
+
+        :param best: solution
+        :param fitness: solution fitness
+        :return: None
+        """
+        if best and (not self.incumbent or fitness < self.rs.get_fitness(self.incumbent)):
+            self.incumbent = best
+        if self.cache is not None and best:
+            self.cache.put_solution(self.stocks, self.orders, best, fitness)
+
+    @timed("flow.random_search")
+    def random_search(self, iterations=100, t=4, target=0, population=100, workers=1):
+        best, fitness, time, log = self.rs.run(iterations=iterations, t=t, target=target, population=population,
+                                               workers=workers)
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "random_search")
+
+    @timed("flow.evo_alg")
+    def evo_alg(self, pop=None, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5, best=None):
+        if self.cached() is not None:
+            return
+        pop = self.warm_start(pop, population)
+        best, fitness, time, log = self.evo.run(pop=pop, population=population, iterations=iterations, t=t, target=target, m=m, mutation_strength=mutation_strength, best=best or self.incumbent)
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "evo_alg")
+
+    @timed("flow.evo_islands")
+    def evo_islands(self, pop=None, islands=4, population=500, iterations=500, t=600, target=0, m=5,
+                    mutation_strength=0.5, migration_interval=10, topology="ring", workers=None):
+        if self.cached() is not None:
+            return
+        pop = self.warm_start(pop, population * islands)
+        best, fitness, time, log = self.evo.run_islands(pop=pop, islands=islands, population=population,
+                                                        iterations=iterations, t=t, target=target, m=m,
+                                                        mutation_strength=mutation_strength,
+                                                        migration_interval=migration_interval, topology=topology,
+                                                        workers=workers)
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "evo_islands")
 
-    def evo_alg(self, pop=None, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5):
-        best, fitness, time, log = self.evo.run(pop=pop, population=population, iterations=iterations, t=t, target=target, m=m, mutation_strength=mutation_strength)
-        print("Best solution: ", best)
-        print("Fitness: ", fitness)
-        print("Time elapsed: {}s".format(time))
-        self.plot_log(log)
+    @timed("flow.column_generation")
+    def column_generation(self, t=60):
+        best, fitness, time, log = self.cg.run(t=t)
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "column_generation")
+        return best
 
+    @timed("flow.aco_alg")
     def aco_alg(self, pop=None, population=500, cycles=500, decay=-0.5):
-        best, fitness, time, log = self.aco.run(pop=pop, population=population, cycles=cycles, decay=decay)
-        print("Best solution: ", best)
-        print("Fitness: ", fitness)
-        print("Time elapsed: {}s".format(time))
-        self.plot_log(log)
+        if self.cached() is not None:
+            return
+        pop = self.warm_start(pop, population)
+        best, fitness, time, log = self.aco.run(pop=pop, population=population, cycles=cycles, decay=decay,
+                                                trail=self.warm_trail())
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "aco_alg")
+
+    @timed("flow.aco_parallel")
+    def aco_parallel(self, pop=None, population=500, cycles=500, decay=-0.5, ants=None, colonies=1, workers=None):
+        if self.cached() is not None:
+            return
+        pop = self.warm_start(pop, population * colonies)
+        best, fitness, time, log = self.aco.run_parallel(pop=pop, population=population, cycles=cycles, decay=decay,
+                                                         ants=ants, colonies=colonies, workers=workers)
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "aco_parallel")
 
+    @timed("flow.iter_aco_alg")
     def iter_aco_alg(self, pop=None, population=500, cycles=500, decay=-0.5, iterations=100):
         best, fitness, time, log = self.aco.run(pop=pop, population=population, cycles=cycles, decay=decay)
+        elapsed = time
         for j in range(iterations):
-            print("------------Iteration {}------------".format(j))
-            pop = [best]
-            for j in range(population - 1):
-                pop.append(self.rs.random_candidate())
+            self.inst.log(PROGRESS, "------------Iteration {}------------".format(j))
+            if gap_closed(fitness, self.bound, self.gap_tol or 0.0):
+                break
+            pop = [best] + self.rs.initial_candidates(population - 1)
             best, fitness, new_time, new_log = self.aco.run(pop=pop, population=population, cycles=cycles, decay=decay)
-            log["candidates"] = log["candidates"] + new_log["candidates"]
-            old_time = log["times"][-1]
-            del log["times"][-1]
-            del log["candidates"][-1]
-            new_log["times"] = [old_time + new_log_time for new_log_time in new_log["times"]]
-            log["times"] = log["times"] + new_log["times"]
-        print("Best solution: ", best)
-        print("Fitness: ", fitness)
-        print("Time elapsed: {}s".format(time))
-        self.plot_log(log)
+            log.extend(new_log, offset=elapsed)
+            elapsed += new_time
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(elapsed))
+        self.plot_log(log, "iter_aco_alg")
 
+    @timed("flow.evo_aco")
     def evo_aco(self):
         best_pops = []
-        log = {"candidates": [], "times": []}
+        log = self.inst.run_log("flow.evo_aco")
+        elapsed = 0  # time of every run so far
         for i in range(10):
             best, fitness, time, new_log = self.evo.run()
             best_pops.append(best)
-            log["candidates"].append(new_log["candidates"][-1])
-            log["times"].append(new_log["times"][-1])
-        best, fitness, time, new_log = self.aco.run(pop=best_pops, population=10)
-        log["candidates"].append(new_log["candidates"][-1])
-        log["times"].append(new_log["times"][-1])
-        for i, time in enumerate(log["times"]):
-            if i > 0:
-                log["times"][i] += log["times"][i - 1]
-        print("Best solution: ", best)
-        print("Fitness: ", fitness)
-        print("Time elapsed: {}s".format(time))
-        self.plot_log(log)
-
-    def plot_log(self, log):
-        fitness = [self.rs.get_fitness(c) for c in log["candidates"]]
-        times = log["times"]
+            elapsed += time
+            log.record(best, fitness, elapsed)
+            if gap_closed(fitness, self.bound, self.gap_tol or 0.0):
+                break
+        best, fitness, time, new_log = self.aco.run(pop=best_pops, population=len(best_pops))
+        elapsed += time
+        log.record(best, fitness, elapsed)
+        log.close()
+        time = elapsed
+        best, fitness = self.remember(best, fitness)
+        self.inst.log(SUMMARY, "Best solution: ", best)
+        self.inst.log(SUMMARY, "Fitness: ", fitness)
+        self.inst.log(SUMMARY, "Time elapsed: {}s".format(time))
+        self.plot_log(log, "evo_aco")
+
+    def report(self, path=None):
+        """
+        Print the throughput and phase timings, and write the full report.
+
+        :param path: report file, Prometheus text format if it ends with .prom, JSON otherwise; None skips writing
+        :return: report dictionary
+        """
+        report = self.inst.report()
+        self.inst.log(SUMMARY, "Candidates per second: {:.1f}".format(report["candidates_per_second"]))
+        for name, p in report["phases"].items():
+            self.inst.log(PROGRESS, "{}: {:.3f}s over {} calls".format(name, p["seconds"], p["calls"]))
+        if path is not None:
+            self.inst.write(path)
+        return report
+
+    def plot_log(self, log, name="log"):
+        """
+        Plot the fitness log against time.
+
+        :param log: RunLog
+        :param name: file name of the plot when saved to a directory
+        :return: None
+        """
+        if self.plots is None:
+            return
+        import matplotlib  # imported on demand, plotting is optional
+        if self.plots != "show":
+            matplotlib.use("Agg")  # no display needed
+        import matplotlib.pyplot as plt
+        fitness = log.fitness
+        times = log.times
 
         plt.plot(times, fitness, marker='o', linestyle='-')
         plt.xlabel("Time (s)")
         plt.ylabel("Fitness")
         plt.title("Performance Log")
         plt.grid(True)
-        plt.show()
+        if self.plots == "show":
+            plt.show()
+        else:
+            os.makedirs(self.plots, exist_ok=True)
+            plt.savefig(os.path.join(self.plots, name + ".png"))
+            plt.close()
 
 
 if __name__ == '__main__':
@@ -123,113 +382,139 @@ if __name__ == '__main__':
     #  setting arguments
     parser = argparse.ArgumentParser(description="Cutting Stock Problem.")
 
-    parser.add_argument('--algorithm', type=str, help='Choose evo/aco/rs', required=True)
-    parser.add_argument('--custom', type=str, help='Custom problem? y/n', required=True)
+    parser.add_argument('--algorithm', type=str, help='Choose evo/aco/rs/cg', required=True)
+    parser.add_argument('--custom', type=str, help='Custom problem typed in at the prompts? y/n', default="n")
+    parser.add_argument('--problem', type=str, help='Problem JSON file, case name (case1-4, u<pieces>, t<pieces>) '
+                                                    'or inline "l=..;c=..;rl=..;q=.."', default="case3")
+    parser.add_argument('--headless', action='store_true', help='Never prompt or open windows, skip the test plots')
+    parser.add_argument('--plots', type=str, help='"show", "none" or a directory to save the plots to')
+    parser.add_argument('--seed', type=int, help='Random seed of the run', default=42)
+    parser.add_argument('--workers', type=int, help='Number of worker processes', default=1)
+    parser.add_argument('--warm-start', action='store_true', help='Warm start evo/aco from column generation')
+    parser.add_argument('--gap-tol', type=float,
+                        help='Stop once within this optimality gap, computes the lower bounds (LP included)')
+    parser.add_argument('--islands', type=int, help='Number of EVO islands, 1 disables the island model', default=1)
+    parser.add_argument('--verbosity', type=int, help='0 quiet, 1 summary, 2 progress, 3 inner loops', default=3)
+    parser.add_argument('--profile', action='store_true', help='Profile with cProfile and tracemalloc')
+    parser.add_argument('--report', type=str, help='Write timers and counters to a .json or .prom file')
+    parser.add_argument('--cache', type=str, help='Pattern and solution cache file, reused across runs')
+    parser.add_argument('--init', type=str, help='Initial populations: random/ffd/bfd/cost', default="random")
+    parser.add_argument('--fill', type=str, help='Completion of mutated candidates: random/ffd/bfd/cost',
+                        default="random")
+    parser.add_argument('--local-search', action='store_true', help='Improve the best solution by local search')
+    parser.add_argument('--polish', type=float, help='Share of every EVO generation improved by local search',
+                        default=0.0)
+    parser.add_argument('--unique', action='store_true',
+                        help='Reject duplicate candidates in EVO generations and ACO colonies')
+    parser.add_argument('--arrays', action='store_true', help='Select EVO seeds on an array-backed population')
+    parser.add_argument('--log-limit', type=int, help='Keep only the last N events of every run log')
+    parser.add_argument('--log-file', type=str, help='Append every run log event to this JSONL file')
 
     #  parse arguments
     args = parser.parse_args()
 
-    if args.algorithm.lower() not in ["evo", "aco", "rs"]:
+    if args.algorithm.lower() not in ["evo", "aco", "rs", "cg"]:
         print(args.algorithm, " is not a valid choice.")
         exit(1)
 
-    #  custom case
-    ccase = {
-        "l": [],  # stock lengths
-        "c": [],  # stock costs
-        "rl": [],  # requested lengths
-        "q": []  # requested quantities
-    }
-    if args.custom.lower() == "y":
-        #  set case
-        print("Insert parameters, separated with comma and no space.")
-        try:
-            l = input("Stock lengths: ").split(",")
-            ccase["l"] = list(map(int, l))
-            if not all(x == 1 for x in list(map(ccase["l"].count, ccase["l"]))):
-                print("Duplicated stock length. Please revise the problem definition.")
-                exit(1)
-            c = input("Stock costs: ").split(",")
-            ccase["c"] = list(map(int, c))
-            if len(c) != len(l):
-                print("Unmatched stock lengths and costs. Please revise the problem definition.")
-                exit(1)
-            rl = input("Requested lengths: ").split(",")
-            ccase["rl"] = list(map(int, rl))
-            q = input("Requested quantities: ").split(",")
-            ccase["q"] = list(map(int, q))
-            if len(rl) != len(q):
-                print("Unmatched requested lengths and quantities. Please revise the problem definition.")
-                exit(1)
-        except ValueError as e:
-            print("Value error: integers only ", type(e))
-            exit(1)
-
-    elif args.custom.lower() not in ["y", "n"]:
+    if args.custom.lower() not in ["y", "n"]:
         print(args.custom.lower(), " is not a valid choice.")
+        exit(1)
 
-    case1 = {
-        "l": [10, 13, 15],  # stock lengths
-        "c": [100, 130, 150],  # stock costs
-        "rl": [3, 4, 5, 6, 7, 8, 9, 10],  # requested lengths
-        "q": [5, 2, 1, 2, 4, 2, 1, 3]  # requested quantities
-    }
-    case2 = {
-        "l": [50, 80, 100],  # stock lengths
-        "c": [100, 175, 250],  # stock costs
-        "rl": [20, 25, 30],  # requested lengths
-        "q": [2, 2, 4]  # requested quantities
-    }
-    case3 = {
-        "l": [4300, 4250, 4150, 3950, 3800, 3700, 3550, 3500],  # stock lengths
-        "c": [86, 85, 83, 79, 68, 66, 64, 63],  # stock costs
-        "rl": [2350, 2250, 2200, 2100, 2050, 2000, 1950, 1900, 1850, 1700, 1650, 1350, 1300, 1250, 1200, 1150, 1100,
-               1050],  # requested lengths
-        "q": [2, 4, 4, 15, 6, 11, 6, 15, 13, 5, 2, 9, 3, 6, 10, 4, 8, 3]  # requested quantities
-    }
-    case4 = {
-        "l": [120, 115, 110, 105, 100],  # stock lengths
-        "c": [12, 11.5, 11, 10.5, 10],  # stock costs
-        "rl": [21, 22, 24, 25, 27, 29, 30, 31, 32, 33, 34, 35, 38, 39, 42, 44, 45, 46, 47, 48, 49, 50, 51, 52, 53, 54,
-               55, 56, 57, 59, 60, 61, 63, 65, 66, 67],  # requested lengths
-        "q": [13, 15, 7, 5, 9, 9, 3, 15, 18, 17, 4, 17, 20, 9, 4, 19, 4, 12, 15, 3, 20, 14, 15, 6, 4, 7, 5, 19, 19, 6,
-              3, 7, 20, 5, 10, 17]  # requested quantities
-    }
-    case5 = {
-        "l": [],  # stock lengths
-        "c": [],  # stock costs
-        "rl": [],  # requested lengths
-        "q": []  # requested quantities
-    }
-
-    if args.custom.lower() == "y":
-        cp = Cutting_Problem(ccase, seed=42)
-    else:
-        cp = Cutting_Problem(case3, seed=42)
-
-    # initiating a testing population
-    test_pop = []
-    for i in range(500):
-        test_pop.append(cp.rs.random_candidate())
-
-    # plotting testing population fitness distribution
-    cp.rs.plot_gaussian()
+    plots = args.plots or ("none" if args.headless else "show")
+    if args.headless and plots == "show":
+        print("Plots cannot be shown in headless mode, save them to a directory instead.")
+        exit(1)
+    if args.headless and args.custom.lower() == "y":
+        parser.error("--custom y prompts for the problem, use --problem in headless mode")
+
+    try:
+        if args.custom.lower() == "y":
+            #  set case
+            print("Insert parameters, separated with comma and no space.")
+            ccase = {
+                "l": list(map(int, input("Stock lengths: ").split(","))),  # stock lengths
+                "c": list(map(int, input("Stock costs: ").split(","))),  # stock costs
+                "rl": list(map(int, input("Requested lengths: ").split(","))),  # requested lengths
+                "q": list(map(int, input("Requested quantities: ").split(",")))  # requested quantities
+            }
+            check_case(ccase)
+        else:
+            ccase = load_case(args.problem)
+    except ValueError as e:
+        print("Value error: ", e)
+        exit(1)
 
     # choose algorithms here
     alg = args.algorithm.lower()
 
+    # lower bounds need the LP relaxation (scipy), only solved when asked for or when it is solved anyway
+    gap_tol = 0.0 if args.gap_tol is None and alg == "cg" else args.gap_tol
+    cp = Cutting_Problem(ccase, seed=args.seed, gap_tol=gap_tol, verbosity=args.verbosity,
+                         plots=None if plots == "none" else plots, cache=args.cache, local_search=args.local_search)
+    cp.evo.set_polish(args.polish)
+    cp.evo.set_unique(args.unique)
+    cp.evo.set_arrays(args.arrays)
+    cp.aco.set_unique(args.unique)
+
+    try:
+        cp.rs.set_construction(args.init, args.fill)
+    except ValueError as e:
+        print("Value error: ", e)
+        exit(1)
+    cp.inst.log_limit = args.log_limit
+    cp.inst.log_path = args.log_file
+    if args.profile:
+        cp.inst.start_profiling()
+
+    test_pop = None
+    if not args.headless:
+        # initiating a testing population
+        test_pop = cp.rs.random_candidates(500)
+
+        # plotting testing population fitness distribution
+        if cp.plots == "show":
+            cp.rs.plot_gaussian()
+        elif cp.plots is not None:
+            os.makedirs(cp.plots, exist_ok=True)
+            cp.rs.plot_gaussian(path=os.path.join(cp.plots, "gaussian.png"))
+
+    warm = None
+    if args.warm_start and alg in ["evo", "aco"]:
+        warm = cp.column_generation()
+        if test_pop is None:
+            test_pop = cp.rs.random_candidates(500)
+        test_pop[0] = warm
+
     if alg == "rs":
         """
         Random Search Algorithm
         """
-        cp.random_search(iterations=100, population=100)
+        cp.random_search(iterations=100, population=100, workers=args.workers)
     elif alg == "evo":
         """
         Evolutionary Algorithm
         """
-        cp.evo_alg(pop=test_pop, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5)
+        if args.islands > 1:
+            cp.evo_islands(pop=test_pop, islands=args.islands, population=500, iterations=500, t=600, target=0, m=5,
+                           mutation_strength=0.5, workers=args.workers)
+        else:
+            cp.evo_alg(pop=test_pop, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5,
+                       best=warm)
     elif alg == "aco":
         """
         Ant Colony Optimization Algorithm
         """
-        cp.aco_alg(pop=test_pop, population=500, cycles=500, decay=-0.5)
+        if args.workers > 1:
+            cp.aco_parallel(pop=test_pop, population=500, cycles=500, decay=-0.5, workers=args.workers)
+        else:
+            cp.aco_alg(pop=test_pop, population=500, cycles=500, decay=-0.5)
+    elif alg == "cg":
+        """
+        Column Generation
+        """
+        cp.column_generation()
+
+    if args.profile:
+        cp.inst.log(SUMMARY, cp.inst.stop_profiling())
+    cp.report(args.report)
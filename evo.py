@@ -1,18 +1,44 @@
+import multiprocessing
 import numpy as np
 import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from population import ArrayPopulation, gaussian_mask
+from candidate import Candidate, PatternCandidate, CandidateMemo, RunningStats, patterns_of
+from ledger import OrderLedger
+from random_search import RandomSearch
+from random_stream import RandomStream
+from bounds import optimality_gap, gap_closed
+from ranking import Ranking, elites
+from localsearch import LocalSearch
+from instrument import Instruments, timed, SUMMARY, PROGRESS, TRACE
+from anytime import Control
+
+_stop = None  # event set by the parent to stop the island epochs of a worker process early
 
 
 class EVO:
     def __init__(self, stocks, rng, rs):
         """
         :param stocks: dictionary of stocks
-        :param rng: random number generator
+        :param rng: numpy random Generator of the engine, or a seed it is created from
+        :param rs: random search model
         :return: None
         """
-        self.rng = rng
+        self.generator = np.random.default_rng(rng)
+        self.stream = RandomStream(self.generator)  # pre-drawn blocks for scalar draws
         self.stocks = stocks
         self.rs = rs
         self.orders = {}
+        self.ledger = OrderLedger(self.orders)
+        self.bound = None  # lower bound of the problem
+        self.gap_tol = 0.0  # accepted optimality gap
+        self.inst = Instruments()  # timers, counters and verbosity
+        self.control = Control()  # deadline, cancellation and improvement listeners
+        self.local = LocalSearch(stocks)  # delta-evaluated local search
+        self.polish = 0.0  # share of every generation improved by local search
+        self.polished = CandidateMemo()  # local search results by canonical key
+        self.unique = False  # reject duplicate candidates in next_generation
+        self.arrays = False  # select seeds on an array-backed population
 
     """
     Initialisation:
@@ -23,13 +49,17 @@ class EVO:
             - If mutation is positive, keep mutation as new seed. Then kill old seed.
             - If mutation is negative, kill mutation, increment seed's age by 1.
         - If seed is mature (age > M), crossover with a random elite as host. Keep offspring as new seed, kill old seed.
+        - Optionally, the best share of the generation is improved by local search.
+        - Optionally, duplicates are rejected: a mutation duplicating a candidate of the new generation is not kept,
+          a seed duplicating one is crossed over at once.
     Termination:
         - If target reached.
         - If time is up.
         - If iteration exceeded.
         - If convergence is reached.
     """
-    def run(self, pop=None, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5):
+    @timed("evo.run")
+    def run(self, pop=None, population=500, iterations=500, t=600, target=0, m=5, mutation_strength=0.5, best=None):
         """
         Runs the evolutionary algorithm for the given number of iterations,
         or time,
@@ -42,34 +72,206 @@ class EVO:
         :param population: number of population
         :param m: mature age
         :param mutation_strength: mutation strength, 1 means no mutation, 0 means complete mutation
+        :param best: known best candidate to start from, e.g. from column generation
+
+        :return: the best solution, fitness, time elapsed (in seconds)
+        """
+        self.inst.log(SUMMARY, "------------Evolutionary Algorithm------------")
+        self.inst.log(SUMMARY, "Initialisation")
+        log = self.inst.run_log("evo.run")
+        try:
+            start_time = time.time()
+            best = best or []  # best candidate
+            ages = {}  # age of each seed candidate, {i, age}
+            seeds = self.seeds_selection(pop, population)
+            go = True
+            while go:
+                for i in range(iterations):
+                    self.inst.log(PROGRESS, "------------Iteration {}------------".format(i))
+                    best = self.rs.get_best(best, seeds)
+                    self.inst.log(TRACE, f'Current best candidate: {best}')
+                    log.record(best, self.rs.get_fitness(best), time.time() - start_time)
+                    self.control.improved(best, self.rs.get_fitness(best))
+                    self.inst.log(PROGRESS, "Best fitness: ", self.rs.get_fitness(best))
+                    if self.bound is not None:
+                        self.inst.log(PROGRESS, "Optimality gap: {:.2%}".format(optimality_gap(self.rs.get_fitness(best), self.bound)))
+                    if gap_closed(self.rs.get_fitness(best), self.bound, self.gap_tol):
+                        self.inst.log(SUMMARY, "Optimality gap closed! Terminating.")
+                        break
+                    if self.rs.get_fitness(best) <= target:
+                        self.inst.log(SUMMARY, "Target reached! Terminating.")
+                        break
+                    seeds, ages = self.next_generation(seeds, population, mutation_strength, ages, m, best)
+                    if time.time() - start_time > t or self.control.expired():
+                        go = False
+                        break
+                go = False
+            self.inst.log(SUMMARY, "------------Terminating------------")
+        finally:
+            log.close()
+        return best, self.rs.get_fitness(best), time.time() - start_time, log
+
+    @timed("evo.run_islands")
+    def run_islands(self, pop=None, islands=4, population=500, iterations=500, t=600, target=0, m=5,
+                    mutation_strength=0.5, migration_interval=10, topology="ring", migrants=1, emigrants="best",
+                    workers=None, seed=None):
+        """
+        Runs the evolutionary algorithm as an island model, every island evolving its own population in a
+        separate process. Every migration_interval generations the islands exchange candidates along the
+        migration topology, and the global best is fed to every island's crossover. Islands check the deadline
+        and cancellation every generation.
+
+        :param pop: predefined population, shared out round robin between the islands
+        :param islands: number of islands
+        :param population: number of population per island
+        :param iterations: number of iterations (generations)
+        :param t: time
+        :param target: solution fitness target
+        :param m: mature age
+        :param mutation_strength: mutation strength, 1 means no mutation, 0 means complete mutation
+        :param migration_interval: number of generations between migrations
+        :param topology: "ring" (from the previous island) or "full" (from every other island)
+        :param migrants: number of candidates every island sends
+        :param emigrants: "best" sends the fittest candidates, "lucky" the fittest of those improved last generation
+        :param workers: number of worker processes, defaults to one per island, 1 runs in this process
+        :param seed: root seed of the island streams, drawn from the engine's generator if None
 
         :return: the best solution, fitness, time elapsed (in seconds)
         """
-        print("------------Evolutionary Algorithm------------")
-        print("Initialisation")
-        log = {"candidates": [],
-               "times": []}
+        if topology not in ("ring", "full"):
+            raise ValueError("Unknown migration topology: {}".format(topology))
+        self.inst.log(SUMMARY, "------------Island Evolutionary Algorithm------------")
+        log = self.inst.run_log("evo.run_islands")
         start_time = time.time()
-        best = []  # best candidate
-        ages = {}  # age of each seed candidate, {i, age}
-        seeds = self.seeds_selection(pop, population)
-        go = True
-        while go:
-            for i in range(iterations):
-                print("------------Iteration {}------------".format(i))
-                best = self.rs.get_best(best, seeds)
-                print(f'Current best candidate: {best}')
-                log["candidates"].append(best)
-                log["times"].append(time.time() - start_time)
-                seeds, ages = self.next_generation(seeds, population, mutation_strength, ages, m, best)
-                print("Best fitness: ", self.rs.get_fitness(best))
-                if time.time() - start_time > t:
-                    go = False
+        if seed is None:
+            seed = int(self.generator.integers(1 << 63))
+        streams = np.random.SeedSequence(seed).spawn(islands)  # one stream per island
+        # (seeds, ages), a predefined population goes through the same seed selection as in run
+        states = [(None if pop is None else self.seeds_selection(pop[k::islands], population), {})
+                  for k in range(islands)]
+        workers = islands if workers is None else workers
+        stop = multiprocessing.Event() if workers > 1 else None  # set once the control expires
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=set_island_stop,
+                                       initargs=(stop,)) if workers > 1 else None
+        deadline = start_time + t
+        best = []  # global best candidate
+        epoch = 0
+        try:
+            for first in range(0, iterations, migration_interval):
+                self.inst.log(PROGRESS, "------------Epoch {}------------".format(epoch))
+                generations = min(migration_interval, iterations - first)
+                jobs = [(self.stocks, self.orders, seeds, ages, best, generations, population, m, mutation_strength,
+                         streams[k].spawn(1)[0]) for k, (seeds, ages) in enumerate(states)]
+                options = {"verbosity": self.inst.verbosity, "construction": self.rs.construction(),
+                           "polish": self.polish, "unique": self.unique, "arrays": self.arrays, "deadline": deadline}
+                if executor is None:
+                    results = [island_epoch(*job, stop=self.control.expired, **options) for job in jobs]
+                else:
+                    futures = [executor.submit(island_epoch, *job, **options) for job in jobs]
+                    while wait(futures, timeout=0.05).not_done:
+                        if self.control.expired():
+                            stop.set()
+                    results = [future.result() for future in futures]
+                states = [(seeds, ages) for seeds, ages, island_best in results]
+                self.inst.count("candidates", generations * population * islands)
+                best = self.rs.get_best(best, [island_best for seeds, ages, island_best in results])
+                log.record(best, self.rs.get_fitness(best), time.time() - start_time)
+                self.control.improved(best, self.rs.get_fitness(best))
+                self.inst.log(PROGRESS, "Best fitness: ", self.rs.get_fitness(best))
+                if self.bound is not None:
+                    self.inst.log(PROGRESS, "Optimality gap: {:.2%}".format(optimality_gap(self.rs.get_fitness(best), self.bound)))
+                if gap_closed(self.rs.get_fitness(best), self.bound, self.gap_tol):
+                    self.inst.log(SUMMARY, "Optimality gap closed! Terminating.")
+                    break
+                if self.rs.get_fitness(best) <= target:
+                    self.inst.log(SUMMARY, "Target reached! Terminating.")
+                    break
+                if time.time() - start_time > t or self.control.expired():
                     break
-            go = False
-        print("------------Terminating------------")
+                states = self.migrate(states, topology, migrants, emigrants)
+                epoch += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            log.close()
+        self.inst.log(SUMMARY, "------------Terminating------------")
         return best, self.rs.get_fitness(best), time.time() - start_time, log
 
+    def migrate(self, states, topology, migrants, emigrants="best"):
+        """
+        Exchange candidates between islands. Immigrants replace the oldest seeds of the receiving island.
+
+        :param states: array of island states (seeds, ages)
+        :param topology: "ring" or "full"
+        :param migrants: number of candidates every island sends
+        :param emigrants: "best" or "lucky"
+
+        :return: new array of island states
+        """
+        outgoing = []
+        for seeds, ages in states:
+            pool = seeds
+            if emigrants == "lucky":  # improved in the last generation
+                pool = [c for i, c in enumerate(seeds) if ages.get(i, 0) == 0] or seeds
+            outgoing.append(elites(pool, migrants, self.rs.get_fitness))
+        new_states = []
+        for k, (seeds, ages) in enumerate(states):
+            if topology == "ring":
+                incoming = list(outgoing[k - 1])
+            else:
+                incoming = [c for j, out in enumerate(outgoing) if j != k for c in out]
+            seeds = list(seeds)
+            ages = dict(ages)
+            oldest = Ranking({i: -ages.get(i, 0) for i in range(len(seeds))}).smallest(len(incoming))
+            for i, c in zip(oldest, incoming):
+                seeds[i] = c
+                ages[i] = 0
+            new_states.append((seeds, ages))
+        return new_states
+
+    def set_bound(self, bound, gap_tol=0.0):
+        """
+        Set the lower bound used to report the optimality gap and stop once it closes.
+
+        :param bound: lower bound of the problem, None disables it
+        :param gap_tol: accepted relative gap
+
+        :return: None
+        """
+        self.bound = bound
+        self.gap_tol = gap_tol
+
+    def set_instruments(self, inst):
+        """
+        Set the instruments recording timers, counters and output verbosity.
+
+        :param inst: Instruments
+
+        :return: None
+        """
+        self.inst = inst
+
+    def set_control(self, control):
+        """
+        Set the run control: deadline, cancellation and improvement listeners.
+
+        :param control: Control
+
+        :return: None
+        """
+        self.control = control
+
+    def reseed(self, seed):
+        """
+        Restart the random stream from a seed.
+
+        :param seed: integer or SeedSequence
+
+        :return: None
+        """
+        self.generator = np.random.default_rng(seed)
+        self.stream = RandomStream(self.generator)
+
     def set_order(self, orders):
         """
         Set order
@@ -79,41 +281,37 @@ class EVO:
         :return: None
         """
         self.orders = orders
+        self.ledger = OrderLedger(orders)
 
-    def seeds_selection(self, pop, population):
+    @timed("selection")
+    def seeds_selection(self, pop, population, stats=None):
         """
         Seeds selection using Gaussian distribution.
 
-        :param pop: population of candidates
+        :param pop: population of candidates, or an ArrayPopulation
         :param population: number of population
+        :param stats: running fitness statistics of pop, if already known
 
         :return: seeds
         """
-        print("Seed selection")
-        seeds = []
-        fitness = {}  # {i: fitness}
+        self.inst.log(TRACE, "Seed selection")
         if pop is None:
-            pop = []
-            for i in range(population):
-                candidate = self.rs.random_candidate()
-                pop.append(candidate)
-                fitness[len(pop) - 1] = self.rs.get_fitness(candidate)
-        else:
-            for i, candidate in enumerate(pop):
-                fitness[i] = self.rs.get_fitness(candidate)
-
-        mean_fitness = np.mean(list(fitness.values()))
-        std_fitness = np.std(list(fitness.values()))
-        lower_bound = mean_fitness - 1*std_fitness
-        upper_bound = mean_fitness + 1*std_fitness
+            pop = self.rs.initial_candidates(population, self.stream)
+        elif not isinstance(pop, ArrayPopulation):
+            pop = self.rs.as_candidates(pop)
+        if self.arrays and not self.rs.packed and not isinstance(pop, ArrayPopulation):
+            pop = ArrayPopulation.from_candidates(self.stocks, self.orders, pop)
+        fitness = self.rs.get_fitnesses(pop)
 
         #  Plot gaussian graph
-        #self.rs.plot_gaussian(pop=list(fitness.values()))
+        #self.rs.plot_gaussian(pop=list(fitness))
 
-        for i, candidate in enumerate(pop):
-            if lower_bound <= fitness[i] <= upper_bound:
-                seeds.append(candidate)
-        print("Seeds selection completed. \nTotal seeds: {}.".format(len(seeds)))
+        mask = gaussian_mask(fitness, 1, stats)  # within 1 standard deviation of the mean
+        if isinstance(pop, ArrayPopulation):
+            seeds = pop.select(mask).to_candidates()
+        else:
+            seeds = [candidate for candidate, keep in zip(pop, mask) if keep]
+        self.inst.log(TRACE, "Seeds selection completed. \nTotal seeds: {}.".format(len(seeds)))
 
         return seeds
 
@@ -130,48 +328,151 @@ class EVO:
 
         :return: new population, new ages
         """
-        print("Next generation in progress.")
+        self.inst.log(TRACE, "Next generation in progress.")
         if not ages:  # if ages not initialised, initialise it
             for i, seed in enumerate(seeds):
                 ages[i] = 0
         pop = []
+        keys = set()  # canonical keys of the new population, if duplicates are rejected
+        stats = RunningStats()  # fitness statistics of the new population
         for i, candidate in enumerate(seeds):
             new_ = self.mutate(candidate, strength)
-            if self.rs.get_fitness(candidate) > self.rs.get_fitness(new_):  # if mutation is better
+            if candidate.cost > new_.cost and not self.duplicate(new_, keys):  # if mutation is better
                 pop.append(new_)
                 ages[i] = 0
             else:
-                if ages[i] >= m:  # if candidate is too old
+                if ages[i] >= m or self.duplicate(candidate, keys):  # if candidate is too old
                     candidate = self.crossover(candidate, best)
                     ages[i] = -1
                 pop.append(candidate)
                 ages[i] = ages[i] + 1
+            if self.unique:
+                keys.add(pop[-1].key)
+            stats.push(pop[-1].cost)
 
         if len(pop) < population:
-            seeds = self.seeds_selection(pop, population)  # seeds for refilling population
+            seeds = self.seeds_selection(pop, population, stats)  # seeds for refilling population
+        rejected = 0
         while len(pop) < population:
-            seed = self.rng.choice(seeds)
-            pop.append(self.mutate(seed, strength))
+            seed = self.stream.choice(seeds)
+            new_ = self.mutate(seed, strength)
+            if self.duplicate(new_, keys) and rejected < population:  # give up rejecting once as many failed
+                rejected += 1
+                continue
+            pop.append(new_)
             ages[len(pop)-1] = 0
+            if self.unique:
+                keys.add(new_.key)
+        if self.polish > 0:
+            self.polish_generation(pop, ages)
         return pop, ages
 
+    @timed("local_search")
+    def polish_generation(self, pop, ages):
+        """
+        Improve the best share of a generation by local search, improved candidates become young again.
+
+        :param pop: population, updated in place
+        :param ages: ages of candidates, updated in place
+
+        :return: None
+        """
+        k = max(1, int(round(self.polish * len(pop))))
+        for i in Ranking({i: c.cost for i, c in enumerate(pop)}).smallest(k):
+            improved = self.improve(pop[i])
+            if improved.cost < pop[i].cost:
+                pop[i] = improved
+                ages[i] = 0
+
+    def improve(self, candidate):
+        """
+        Improve a candidate by local search. Results are memoised by canonical key, so candidates already
+        improved, or identical to one up to the order of activities and pieces, are not searched again.
+
+        :param candidate: Candidate or PatternCandidate
+
+        :return: improved candidate, or the candidate itself if no move improves it
+        """
+        improved = self.polished.get(candidate)
+        if improved is None:
+            improved = self.local.improve(candidate)
+            self.polished.put(candidate, improved)
+        else:
+            self.inst.count("memo_hits")
+        return improved if improved.cost < candidate.cost else candidate
+
+    def duplicate(self, candidate, keys):
+        """
+        Check if duplicates are rejected and a candidate duplicates one of the new generation.
+
+        :param candidate: Candidate or PatternCandidate
+        :param keys: canonical keys of the new generation
+
+        :return: True or False
+        """
+        if self.unique and candidate.key in keys:
+            self.inst.count("duplicates")
+            return True
+        return False
+
+    def set_arrays(self, arrays):
+        """
+        Set whether seeds are selected on an array-backed population: the fitness of the whole population is one
+        reduction and the Gaussian filter a boolean mask. Ignored for large order books held as patterns.
+
+        :param arrays: True or False
+
+        :return: None
+        """
+        self.arrays = arrays
+
+    def set_unique(self, unique):
+        """
+        Set whether duplicate candidates, equal up to the order of activities and pieces, are rejected.
+
+        :param unique: True or False
+
+        :return: None
+        """
+        self.unique = unique
+
+    def set_polish(self, share):
+        """
+        Set the share of every generation improved by local search.
+
+        :param share: share of the population, 0 disables local search
+
+        :return: None
+        """
+        self.polish = share
+
+    @timed("mutation")
     def mutate(self, candidate, mutation_strength):
         """
-        Mutate the given candidate.
+        Mutate the given candidate: every activity is kept with probability mutation_strength, for Candidates and
+        PatternCandidates alike, and the removed pieces are filled again.
 
         :param candidate: candidate solution
         :param mutation_strength: strength
 
         :return: mutated candidate
         """
-        temp = []
-        for a in candidate:
-            if self.rng.randint(0, 10) < mutation_strength*10:
-                temp.append(a)
+        self.inst.count("candidates")
+        if isinstance(candidate, PatternCandidate):  # one binomial draw per pattern
+            temp = candidate.sample(mutation_strength, self.generator, self.stocks)
+            if len(temp) != len(candidate):
+                temp = self.fill_order(temp)
+            return temp
+        temp = Candidate()
+        kept = (self.generator.random(len(candidate)) < mutation_strength).tolist()  # as sample() keeps bars
+        for a, keep in zip(candidate, kept):
+            if keep:
+                temp.add(a, self.stocks[a[0]])
         if len(temp) != len(candidate):
             temp = self.fill_order(temp)
         return temp
 
+    @timed("crossover")
     def crossover(self, host, source):
         """
         Perform crossover between host and source.
@@ -181,52 +482,153 @@ class EVO:
 
         :return: offspring candidate
         """
-        orders = self.orders.copy()
-        offspring = []
-        for a in host:
-            if self.rng.randint(0, 10) < 5:
-                offspring.append(a)
-                for rl in a[1:]:
-                    orders[rl] = orders[rl] - 1
+        self.inst.count("candidates")
+        orders = self.ledger.copy()
+        if isinstance(host, PatternCandidate):  # whole patterns, as many bars as still fit
+            offspring = host.sample(0.5, self.generator, self.stocks)
+            orders.subtract_candidate(offspring)
+            for (l, rl_tuple), n in patterns_of(source).items():
+                n = min(n, orders.repeats(rl_tuple))
+                offspring.add_pattern(l, rl_tuple, n, self.stocks[l])
+                orders.subtract_pattern(rl_tuple, n)
+            return self.fill_order(offspring, orders)
+        offspring = Candidate()
+        kept = (self.generator.random(len(host)) < 0.5).tolist()  # as sample() keeps bars
+        for a, keep in zip(host, kept):
+            if keep:
+                offspring.add(a, self.stocks[a[0]])
+        orders.subtract_candidate(offspring)
         for a in source:
-            if self.activity_is_valid(a, orders):
-                offspring.append(a)
-                for rl in a[1:]:
-                    orders[rl] -= 1
-        offspring = self.fill_order(offspring)
+            if orders.can_subtract(a):
+                offspring.add(a, self.stocks[a[0]])
+                orders.subtract(a)
+        offspring = self.fill_order(offspring, orders)
         return offspring
 
+    @timed("repair")
+    def repair(self, candidate):
+        """
+        Repair a solution of an earlier order book into a solution of the current orders. Activities still fully
+        requested are kept as they are. The others keep only the pieces still requested, cut from the cheapest
+        stock length they fit, and are dropped once empty. The missing pieces are then filled.
+
+        :param candidate: solution of the earlier orders
+
+        :return: repaired candidate
+        """
+        orders = self.ledger.copy()
+        repaired = self.rs.new_candidate()
+        over_supplied = []  # (pattern, bars)
+        for (l, rl_tuple), n in patterns_of(candidate).items():
+            kept = min(n, orders.repeats(rl_tuple))
+            repaired.add_pattern(l, rl_tuple, kept, self.stocks[l])
+            orders.subtract_pattern(rl_tuple, kept)
+            if kept < n:
+                over_supplied.append((rl_tuple, n - kept))
+        for rl_tuple, n in over_supplied:
+            for k in range(n):
+                pieces = []
+                for rl in [rl for rl, count in rl_tuple for i in range(count)]:
+                    i = orders.position.get(rl)
+                    if i is not None and orders.q[i] > 0:
+                        orders.take(rl)
+                        pieces.append(rl)
+                if not pieces:  # none of its lengths is requested any more
+                    break
+                l = min((l for l in self.stocks.keys() if l >= sum(pieces)), key=lambda l: (self.stocks[l], l))
+                repaired.add([l] + pieces, self.stocks[l])
+        return self.fill_order(repaired, orders)
+
     def activity_is_valid(self, a, orders):
         """
         Check if given activity is fittable with regard to remaining orders.
 
         :param a: activity
-        :param orders: remaining orders
+        :param orders: remaining orders, OrderLedger or dictionary of orders
 
         :return: True or False
         """
-        r = {}  # requested quantities within the activity, {rl, q}
-        for rl in a[1:]:
-            if rl in r:
-                r[rl] += 1
-            else:
-                r[rl] = 1
-        for key in r.keys():
-            if orders[key] < r[key]:
-                return False
-        return True
+        if not isinstance(orders, OrderLedger):
+            orders = OrderLedger(orders)
+        return orders.can_subtract(a)
 
-    def fill_order(self, candidate):
+    @timed("fill")
+    def fill_order(self, candidate, orders=None, rng=None):
         """
-        Fill incomplete candidate randomly.
+        Fill incomplete candidate with the fill strategy of the random search model (uniform random by default),
+        its cached cost is updated as activities are added.
 
         :param candidate: candidate solution
+        :param orders: remaining orders of the candidate as an OrderLedger, derived from candidate if None
+        :param rng: source of uniform draws with a random() method, the engine's stream if None
 
         :return: completed candidate
         """
-        orders = self.orders.copy()
-        for a in candidate:
-            for rl in a[1:]:
-                orders[rl] -= 1
-        new_ = self.rs.random_candidate(orders, candidate)
+        if orders is None:
+            orders = self.ledger.copy()
+            orders.subtract_candidate(candidate)
+        new_ = self.rs.fill_candidate(orders, candidate, rng or self.stream)
         return new_
+
+
+def set_island_stop(stop):
+    """
+    Initializer of the island worker processes, hands them the event stopping their epochs early.
+
+    :param stop: multiprocessing Event
+
+    :return: None
+    """
+    global _stop
+    _stop = stop
+
+
+def island_epoch(stocks, orders, seeds, ages, best, generations, population, m, mutation_strength, seed,
+                 verbosity=TRACE, construction=None, polish=0.0, unique=False,
+                 arrays=False, deadline=None, stop=None):
+    """
+    Evolve one island for a number of generations, with its own random stream. The epoch ends early once the
+    deadline passes or stop is set.
+
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+    :param seeds: seeds of the island, selected from a new random population if None
+    :param ages: ages of the seeds
+    :param best: current global best candidate
+    :param generations: number of generations
+    :param population: number of population
+    :param m: mature age
+    :param mutation_strength: mutation strength
+    :param seed: SeedSequence of the epoch
+    :param verbosity: output verbosity of the island
+    :param construction: construction strategies (init, fill, noise), uniform random if None
+    :param polish: share of every generation improved by local search
+    :param unique: reject duplicate candidates
+    :param arrays: select seeds on an array-backed population
+    :param deadline: wall-clock time at which the epoch stops, None for no deadline
+    :param stop: callable returning True to stop, the worker process's stop event if None
+
+    :return: seeds, ages, best candidate of the island
+    """
+    rs_seed, evo_seed = seed.spawn(2)
+    rs = RandomSearch(stocks, np.random.default_rng(rs_seed))
+    rs.set_order(orders)
+    if construction is not None:
+        rs.set_construction(*construction)
+    evo = EVO(stocks, np.random.default_rng(evo_seed), rs)
+    evo.set_order(orders)
+    evo.set_instruments(Instruments(verbosity))
+    evo.set_polish(polish)
+    evo.set_unique(unique)
+    evo.set_arrays(arrays)
+    if seeds is None:
+        seeds = evo.seeds_selection(None, population)
+    island_best = rs.get_best([], seeds)
+    if stop is None and _stop is not None:
+        stop = _stop.is_set
+    for i in range(generations):
+        if (deadline is not None and time.time() > deadline) or (stop is not None and stop()):
+            break
+        seeds, ages = evo.next_generation(seeds, population, mutation_strength, ages, m, rs.get_best(best, [island_best]))
+        island_best = rs.get_best(island_best, seeds)
+    return seeds, ages, island_best
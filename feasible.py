@@ -0,0 +1,58 @@
+from bisect import bisect_right
+
+
+class FeasibleIndex:
+    MAX_TABLE = 1 << 16  # largest stock length with a tabulated capacity -> mask lookup
+
+    def __init__(self, stocks, orders):
+        """
+        Precomputed index of requested lengths, answers which lengths still fit into a given capacity.
+
+        Requested lengths are sorted ascending and addressed by bit position, so a set of lengths is an
+        integer bitmask and "fits into capacity X" is a bisect followed by a prefix mask. For integer stock
+        lengths up to MAX_TABLE the prefix masks are tabulated per capacity instead.
+
+        :param stocks: dictionary of stocks
+        :param orders: dictionary of orders
+
+        :return: None
+        """
+        self.lengths = sorted(orders.keys())
+        self.position = {rl: i for i, rl in enumerate(self.lengths)}
+        self.stock_masks = {l: self.prefix_mask(l) for l in stocks.keys()}  # lengths fitting an empty stock
+        self.mask_at = self.prefix_mask  # capacity -> prefix mask, a table lookup when possible
+        top = max(stocks.keys(), default=0)
+        if all(isinstance(l, int) for l in stocks.keys()) and top <= self.MAX_TABLE:
+            self.mask_at = [self.prefix_mask(capacity) for capacity in range(top + 1)].__getitem__
+
+    def prefix_mask(self, capacity):
+        """
+        Bitmask of every requested length less or equal to the capacity.
+
+        :param capacity: available length
+
+        :return: bitmask
+        """
+        return (1 << bisect_right(self.lengths, capacity)) - 1
+
+    def pick(self, mask, draw):
+        """
+        Return a uniformly random requested length among the set bits of the mask.
+
+        Dense masks are sampled by rejection over the bit positions, sparse masks by walking to the n-th set bit.
+
+        :param mask: non-empty bitmask of lengths
+        :param draw: callable returning a uniform draw in [0, 1)
+
+        :return: requested length
+        """
+        top = mask.bit_length()
+        count = mask.bit_count()
+        if 2 * count >= top:  # at most two tries expected
+            while True:
+                i = int(draw() * top)
+                if mask >> i & 1:
+                    return self.lengths[i]
+        for i in range(int(draw() * count)):
+            mask &= mask - 1  # clear lowest set bit
+        return self.lengths[(mask & -mask).bit_length() - 1]
@@ -0,0 +1,130 @@
+from bisect import bisect_left, insort
+from candidate import PatternCandidate
+
+STRATEGIES = ["random", "ffd", "bfd", "cost"]  # construction strategies, "random" is RandomSearch.random_candidate
+
+
+class Greedy:
+    def __init__(self, stocks):
+        """
+        Greedy constructors: First-Fit-Decreasing, Best-Fit-Decreasing and a cost-aware Best-Fit-Decreasing.
+        Pieces are placed longest first, so a candidate of n pieces is built in O(n log n) at most.
+
+        :param stocks: dictionary of stocks
+
+        :return: None
+        """
+        self.stocks = stocks
+        self.longest = max(stocks.keys())
+        self.by_cost = sorted(stocks.keys(), key=lambda l: (stocks[l], l))  # cheapest bar first
+
+    def construct(self, orders, candidate, strategy="ffd", noise=0.0, draw=None):
+        """
+        Complete a candidate greedily. Pieces are taken longest first, every length scaled by a random factor in
+        [1 - noise / 2, 1 + noise / 2] when noise is given. Every bar moves at the end to the cheapest stock
+        length that holds its pieces.
+            - ffd: bars are filled one at a time with the longest pieces that still fit, and every bar is repeated
+              as long as its pattern fits the remaining orders. This places pieces exactly as First-Fit-Decreasing.
+            - bfd: every piece goes into the open bar it leaves the least room in, new bars are cut from the
+              longest stock.
+            - cost: as ffd, every bar is filled on each stock length in turn and the one with the lowest cost per
+              unit of length of the pieces it holds is kept.
+        PatternCandidates are always filled one bar at a time as for ffd, with the stock choice of the strategy.
+
+        :param orders: remaining orders as an OrderLedger, consumed
+        :param candidate: Candidate or PatternCandidate, completed in place
+        :param strategy: "ffd", "bfd" or "cost"
+        :param noise: perturbation of the piece order, 0 for the deterministic order
+        :param draw: uniform draws in [0, 1), required when noise is given
+
+        :return: candidate
+        """
+        if strategy not in ("ffd", "bfd", "cost"):
+            raise ValueError("Unknown construction strategy: {}".format(strategy))
+        if strategy != "bfd" or isinstance(candidate, PatternCandidate):
+            return self.fill_bars(orders, candidate, strategy, noise, draw)
+        pieces = [rl for rl, q in zip(orders.lengths, orders.q) for i in range(q)]
+        if noise:
+            pieces.sort(key=lambda rl: -rl * (1 + noise * (draw() - 0.5)))
+        else:
+            pieces.sort(reverse=True)
+        bars = []  # [stock length, residual capacity, pieces]
+        residuals = []  # sorted (residual capacity, bar)
+        for rl in pieces:
+            k = bisect_left(residuals, (rl,))
+            if k < len(residuals):
+                j = residuals.pop(k)[1]
+            else:
+                j = len(bars)
+                bars.append([self.longest, self.longest, []])
+            bars[j][1] -= rl
+            bars[j][2].append(rl)
+            insort(residuals, (bars[j][1], j))
+        for l, residual, placed in bars:
+            l = self.cheapest(l - residual)
+            candidate.add([l] + placed, self.stocks[l])
+        orders.subtract_pattern(tuple((rl, q) for rl, q in zip(orders.lengths, orders.q) if q > 0))
+        return candidate
+
+    def fill_bars(self, orders, candidate, strategy, noise, draw):
+        """
+        Fill bars one at a time with the longest pieces that still fit, repeating every bar as long as its pattern
+        fits the remaining orders. O(number of patterns x number of requested lengths), times the number of stock
+        lengths for cost.
+
+        :param orders: remaining orders as an OrderLedger, consumed
+        :param candidate: Candidate or PatternCandidate, completed in place
+        :param strategy: "ffd", "bfd" or "cost", cost fills the bar on every stock length and keeps the one with the
+            lowest cost per unit of length placed
+        :param noise: perturbation of the piece order, 0 for the deterministic order
+        :param draw: uniform draws in [0, 1), required when noise is given
+
+        :return: candidate
+        """
+        while orders.total > 0:
+            lengths = [rl for rl, q in zip(orders.lengths, orders.q) if q > 0]
+            if noise:
+                lengths.sort(key=lambda rl: -rl * (1 + noise * (draw() - 0.5)))
+            else:
+                lengths.sort(reverse=True)
+            if strategy == "cost":
+                bars = (self.fill_bar(l, lengths, orders) for l in self.stocks)
+                l, used, rl_counter = min((bar for bar in bars if bar[1] > 0),  # stocks holding a piece at least
+                                          key=lambda bar: (self.stocks[self.cheapest(bar[1])] / bar[1], -bar[1]))
+            else:
+                l, used, rl_counter = self.fill_bar(self.longest, lengths, orders)
+            rl_tuple = tuple(sorted(rl_counter.items()))
+            n = orders.repeats(rl_tuple)
+            orders.subtract_pattern(rl_tuple, n)
+            l = self.cheapest(used)
+            candidate.add_pattern(l, rl_tuple, n, self.stocks[l])
+        return candidate
+
+    def fill_bar(self, l, lengths, orders):
+        """
+        Fill one bar with the given lengths in order, each as many times as fits and is still requested.
+
+        :param l: stock length
+        :param lengths: requested lengths, in placement order
+        :param orders: remaining orders as an OrderLedger, left untouched
+
+        :return: stock length, used length, {rl: count}
+        """
+        capacity = l
+        rl_counter = {}
+        for rl in lengths:
+            k = min(orders.q[orders.position[rl]], capacity // rl)
+            if k:
+                rl_counter[rl] = k
+                capacity -= k * rl
+        return l, l - capacity, rl_counter
+
+    def cheapest(self, used):
+        """
+        Cheapest stock length holding the given length.
+
+        :param used: used length
+
+        :return: stock length
+        """
+        return next(l for l in self.by_cost if l >= used)
@@ -0,0 +1,244 @@
+import functools
+import io
+import json
+import sys
+import time
+import cProfile
+import pstats
+import tracemalloc
+from runlog import RunLog
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+QUIET = 0  # no output
+SUMMARY = 1  # run headers, terminations and results
+PROGRESS = 2  # one line per iteration, cycle or epoch
+TRACE = 3  # inner-loop messages
+
+
+class Instruments:
+    def __init__(self, verbosity=TRACE):
+        """
+        Per-phase timers and counters shared by the engines, and the verbosity of their output.
+
+        :param verbosity: QUIET, SUMMARY, PROGRESS or TRACE
+
+        :return: None
+        """
+        self.verbosity = verbosity
+        self.reset()
+        self.profiler = None  # cProfile.Profile while profiling
+        self.profile = None  # text report of the last profile
+        self.log_limit = None  # events kept per run log, None keeps every event
+        self.log_path = None  # JSONL file run logs spill their events to, None skips spilling
+
+    def reset(self):
+        """
+        Clear every timer and counter and restart the wall clock.
+
+        :return: None
+        """
+        self.start = time.perf_counter()
+        self.seconds = {}  # {phase: seconds}, inclusive of nested phases
+        self.calls = {}  # {phase: number of calls}
+        self.counters = {}  # {name: count}
+
+    def log(self, level, *args):
+        """
+        Print if the verbosity is at least the given level.
+
+        :param level: SUMMARY, PROGRESS or TRACE
+        :param args: values to print
+
+        :return: None
+        """
+        if self.verbosity >= level:
+            print(*args)
+
+    def run_log(self, name="run"):
+        """
+        New log of an engine run, with the configured limit and spill file.
+
+        :param name: run name
+
+        :return: RunLog
+        """
+        return RunLog(limit=self.log_limit, path=self.log_path, name=name)
+
+    def phase(self, name):
+        """
+        Context manager timing a phase.
+
+        :param name: phase name
+
+        :return: context manager
+        """
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        """
+        Record one call of a phase.
+
+        :param name: phase name
+        :param seconds: time spent
+
+        :return: None
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, n=1):
+        """
+        Increment a counter.
+
+        :param name: counter name
+        :param n: increment
+
+        :return: None
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def start_profiling(self, cpu=True, memory=True):
+        """
+        Start cProfile and/or tracemalloc.
+
+        :param cpu: profile function calls with cProfile
+        :param memory: trace allocations with tracemalloc
+
+        :return: None
+        """
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cpu:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop_profiling(self, top=25):
+        """
+        Stop profiling and keep the text report of the heaviest functions.
+
+        :param top: number of functions reported
+
+        :return: profile report
+        """
+        if self.profiler is not None:
+            self.profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(top)
+            self.profile = out.getvalue()
+            self.profiler = None
+        return self.profile
+
+    def memory(self):
+        """
+        Memory high-water marks in bytes.
+
+        :return: dictionary {source: bytes}, rss of the process and tracemalloc peak when tracing
+        """
+        peaks = {}
+        if resource is not None:
+            rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peaks["rss"] = rss if sys.platform == "darwin" else rss * 1024  # KiB on Linux
+        if tracemalloc.is_tracing():
+            peaks["traced"] = tracemalloc.get_traced_memory()[1]
+        return peaks
+
+    def report(self):
+        """
+        Snapshot of every timer and counter.
+
+        :return: dictionary
+        """
+        wall = time.perf_counter() - self.start
+        report = {"wall_seconds": wall,
+                  "phases": {name: {"seconds": self.seconds[name], "calls": self.calls[name]}
+                             for name in sorted(self.seconds)},
+                  "counters": dict(sorted(self.counters.items())),
+                  "candidates_per_second": self.counters.get("candidates", 0) / wall if wall > 0 else 0.0,
+                  "memory_peak_bytes": self.memory()}
+        if self.profile is not None:
+            report["profile"] = self.profile
+        return report
+
+    def to_json(self):
+        """
+        Report as JSON.
+
+        :return: string
+        """
+        return json.dumps(self.report(), indent=2)
+
+    def to_prometheus(self, prefix="cutting_stock"):
+        """
+        Report in the Prometheus text exposition format.
+
+        :param prefix: metric name prefix
+
+        :return: string
+        """
+        report = self.report()
+        lines = ["# TYPE {}_wall_seconds gauge".format(prefix),
+                 "{}_wall_seconds {}".format(prefix, report["wall_seconds"]),
+                 "# TYPE {}_phase_seconds_total counter".format(prefix)]
+        lines += ['{}_phase_seconds_total{{phase="{}"}} {}'.format(prefix, name, p["seconds"])
+                  for name, p in report["phases"].items()]
+        lines.append("# TYPE {}_phase_calls_total counter".format(prefix))
+        lines += ['{}_phase_calls_total{{phase="{}"}} {}'.format(prefix, name, p["calls"])
+                  for name, p in report["phases"].items()]
+        lines.append("# TYPE {}_events_total counter".format(prefix))
+        lines += ['{}_events_total{{name="{}"}} {}'.format(prefix, name, n) for name, n in report["counters"].items()]
+        lines.append("# TYPE {}_candidates_per_second gauge".format(prefix))
+        lines.append("{}_candidates_per_second {}".format(prefix, report["candidates_per_second"]))
+        lines.append("# TYPE {}_memory_peak_bytes gauge".format(prefix))
+        lines += ['{}_memory_peak_bytes{{source="{}"}} {}'.format(prefix, source, n)
+                  for source, n in report["memory_peak_bytes"].items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Write the report, in Prometheus text format if the path ends with .prom, otherwise as JSON.
+
+        :param path: file path
+
+        :return: None
+        """
+        with open(path, "w") as f:
+            f.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+
+class _Phase:
+    __slots__ = ("inst", "name", "start")
+
+    def __init__(self, inst, name):
+        self.inst = inst
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.inst.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timed(name):
+    """
+    Decorator timing a method as a phase of its object's instruments (self.inst).
+
+    :param name: phase name
+
+    :return: decorator
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self.inst.add(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
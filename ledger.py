@@ -0,0 +1,161 @@
+import numpy as np
+from candidate import PatternCandidate
+
+
+class OrderLedger:
+    def __init__(self, orders):
+        """
+        Remaining demand of an order book, with an O(1) total and a bitmask of lengths still in demand.
+
+        Requested lengths are kept sorted ascending, the same positions FeasibleIndex uses. Quantities are held
+        as a list for cheap single-piece updates, the numpy view used by vectorized checks is rebuilt lazily.
+
+        :param orders: dictionary of orders {rl: q}
+
+        :return: None
+        """
+        self.lengths = sorted(orders.keys())
+        self.position = {rl: i for i, rl in enumerate(self.lengths)}
+        self.q = [orders[rl] for rl in self.lengths]  # remaining quantities
+        self.total = sum(self.q)  # remaining pieces
+        self.active = 0  # bitmask of lengths with remaining quantity
+        self._array = None  # numpy view of q, None when stale
+        for i, q in enumerate(self.q):
+            if q > 0:
+                self.active |= 1 << i
+
+    def copy(self):
+        """
+        Return an independent copy of the ledger.
+
+        :return: OrderLedger
+        """
+        new_ = OrderLedger.__new__(OrderLedger)
+        new_.lengths = self.lengths
+        new_.position = self.position
+        new_.q = self.q.copy()
+        new_.total = self.total
+        new_.active = self.active
+        new_._array = None
+        return new_
+
+    def counts(self):
+        """
+        Remaining quantities as a numpy array.
+
+        :return: numpy array of quantities
+        """
+        if self._array is None:
+            self._array = np.array(self.q, dtype=np.int64)
+        return self._array
+
+    def take(self, rl):
+        """
+        Consume one piece of the requested length.
+
+        :param rl: requested length
+
+        :return: None
+        """
+        i = self.position[rl]
+        self.q[i] -= 1
+        self.total -= 1
+        self._array = None
+        if self.q[i] == 0:
+            self.active &= ~(1 << i)
+
+    def pattern(self, a):
+        """
+        Pattern-count vector of an activity, pieces per requested length.
+
+        :param a: activity
+
+        :return: numpy array of counts
+        """
+        return np.bincount([self.position[rl] for rl in a[1:]], minlength=len(self.lengths))
+
+    def can_subtract(self, a):
+        """
+        Check if given activity is fittable with regard to remaining orders.
+
+        :param a: activity
+
+        :return: True or False, False if the activity holds a length no longer requested
+        """
+        try:
+            return bool(np.all(self.pattern(a) <= self.counts()))
+        except KeyError:
+            return False
+
+    def subtract(self, a):
+        """
+        Consume the pieces of an activity.
+
+        :param a: activity
+
+        :return: None
+        """
+        self._apply(self.pattern(a))
+
+    def repeats(self, rl_tuple):
+        """
+        Number of times a pattern fits the remaining orders.
+
+        :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+
+        :return: integer, 0 if the pattern holds a length no longer requested or no piece at all
+        """
+        try:
+            return min((self.q[self.position[rl]] // n for rl, n in rl_tuple), default=0)
+        except KeyError:
+            return 0
+
+    def subtract_pattern(self, rl_tuple, n=1):
+        """
+        Consume the pieces of n bars cutting the same pattern.
+
+        :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+        :param n: number of bars
+
+        :return: None
+        """
+        if n <= 0:
+            return
+        for rl, k in rl_tuple:
+            i = self.position[rl]
+            self.q[i] -= k * n
+            self.total -= k * n
+            if self.q[i] <= 0:
+                self.active &= ~(1 << i)
+        self._array = None
+
+    def subtract_candidate(self, candidate):
+        """
+        Consume the pieces of every activity in a candidate at once.
+
+        :param candidate: array of activities, or a PatternCandidate
+
+        :return: None
+        """
+        if isinstance(candidate, PatternCandidate):
+            for (l, rl_tuple), n in candidate.patterns.items():
+                self.subtract_pattern(rl_tuple, n)
+            return
+        pieces = [self.position[rl] for a in candidate for rl in a[1:]]
+        self._apply(np.bincount(pieces, minlength=len(self.lengths)))
+
+    def _apply(self, counts):
+        """
+        Subtract a pattern-count vector and refresh the total and the active mask.
+
+        :param counts: numpy array of counts
+
+        :return: None
+        """
+        array = self.counts()
+        array -= counts
+        self.q = array.tolist()
+        self.total -= int(counts.sum())
+        for i in np.flatnonzero(counts).tolist():
+            if self.q[i] <= 0:
+                self.active &= ~(1 << i)
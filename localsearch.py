@@ -0,0 +1,191 @@
+from bisect import bisect_left, insort
+from candidate import Candidate, PatternCandidate
+
+
+class LocalSearch:
+    def __init__(self, stocks):
+        """
+        Local search over the bars of a candidate. Every bar is priced at the cheapest stock length holding its
+        pieces, so the cost change of a move only depends on the used lengths of the bars it touches and is
+        evaluated in O(1) (a bisection over the few stock lengths).
+
+        Moves:
+            - downgrade: cut a bar from the cheapest stock length that holds its pieces.
+            - merge: cut two bars from a single one when it is cheaper.
+            - relocate: move pieces of a bar into the free room of other bars, longest first, when the bar can
+              then be cut from a cheaper stock length or disappears.
+
+        :param stocks: dictionary of stocks
+
+        :return: None
+        """
+        self.stocks = stocks
+        self.lengths = sorted(stocks.keys())  # ascending
+        self.longest = self.lengths[-1]
+        self.cheapest = []  # cheapest stock length at least as long as lengths[k]
+        best = None
+        for l in reversed(self.lengths):
+            if best is None or (stocks[l], l) < (stocks[best], best):
+                best = l
+            self.cheapest.append(best)
+        self.cheapest.reverse()
+
+    def stock(self, used):
+        """
+        Cheapest stock length holding a used length.
+
+        :param used: used length, at most the longest stock length
+
+        :return: stock length
+        """
+        return self.cheapest[bisect_left(self.lengths, used)]
+
+    def cost(self, used):
+        """
+        Cost of a bar with the given used length.
+
+        :param used: used length
+
+        :return: cost, 0 for an empty bar
+        """
+        return self.stocks[self.stock(used)] if used > 0 else 0
+
+    def improve(self, candidate, passes=10):
+        """
+        Apply improving moves until none is found or the passes are spent. The candidate itself is left
+        untouched. PatternCandidates are improved with downgrades and merges of whole patterns.
+
+        :param candidate: Candidate or PatternCandidate
+        :param passes: maximum number of passes over every move
+
+        :return: improved candidate, or the candidate itself if no move improves it
+        """
+        if isinstance(candidate, PatternCandidate):
+            return self.improve_patterns(candidate, passes)
+        bars = [[sum(a[1:]), sorted(a[1:], reverse=True)] for a in candidate]  # [used length, pieces]
+        for i in range(passes):
+            if self.merge(bars) + self.relocate(bars) >= 0:
+                break
+        improved = Candidate()
+        for used, pieces in bars:
+            if pieces:
+                l = self.stock(used)
+                improved.add([l] + pieces, self.stocks[l])
+        cost = candidate.cost if isinstance(candidate, Candidate) else sum(self.stocks[a[0]] for a in candidate)
+        return improved if improved.cost < cost else candidate
+
+    def merge(self, bars):
+        """
+        Merge pairs of bars, the shortest with the longest one it fits with, when one bar is cheaper than two.
+
+        :param bars: array of [used length, pieces], updated in place
+
+        :return: cost change
+        """
+        order = sorted((b for b in range(len(bars)) if bars[b][1]), key=lambda b: bars[b][0])
+        total = 0
+        lo, hi = 0, len(order) - 1
+        while lo < hi:
+            i, j = order[lo], order[hi]
+            u_i, u_j = bars[i][0], bars[j][0]
+            if u_i + u_j > self.longest:  # j fits with no bar at least as long as i
+                hi -= 1
+                continue
+            delta = self.cost(u_i + u_j) - self.cost(u_i) - self.cost(u_j)
+            if delta < 0:
+                bars[j][0] += u_i
+                bars[j][1] = sorted(bars[j][1] + bars[i][1], reverse=True)
+                bars[i] = [0, []]
+                total += delta
+                hi -= 1
+            lo += 1
+        return total
+
+    def relocate(self, bars):
+        """
+        For every bar, shortest first, move its pieces into the free room other bars have on their current stock
+        length, longest piece first and into the tightest room. Such moves cost nothing, so a bar's moves are kept
+        when its own cost drops and undone otherwise.
+
+        :param bars: array of [used length, pieces], updated in place
+
+        :return: cost change
+        """
+        room = sorted((self.stock(u) - u, b) for b, (u, pieces) in enumerate(bars) if pieces)  # (free room, bar)
+        total = 0
+        for i in sorted((b for b in range(len(bars)) if bars[b][1]), key=lambda b: bars[b][0]):
+            u_i, pieces = bars[i]
+            own = (self.stock(u_i) - u_i, i)
+            room.pop(bisect_left(room, own))
+            moves = []  # (piece, bar, room before, room after)
+            kept = []
+            for p in pieces:
+                k = bisect_left(room, (p, -1))
+                if k == len(room):
+                    kept.append(p)
+                    continue
+                free, j = room.pop(k)
+                insort(room, (free - p, j))
+                bars[j][0] += p
+                bars[j][1].append(p)
+                moves.append((p, j, (free, j), (free - p, j)))
+            used = u_i - sum(p for p, j, before, after in moves)
+            delta = self.cost(used) - self.cost(u_i)
+            if moves and delta < 0:
+                for p, j, before, after in moves:
+                    bars[j][1].sort(reverse=True)
+                bars[i] = [used, kept]
+                total += delta
+                if kept:
+                    insort(room, (self.stock(used) - used, i))
+            else:  # undo
+                for p, j, before, after in reversed(moves):
+                    room.pop(bisect_left(room, after))
+                    insort(room, before)
+                    bars[j][0] -= p
+                    bars[j][1].pop()
+                insort(room, own)
+        return total
+
+    def improve_patterns(self, candidate, passes=10):
+        """
+        Downgrade and merge the patterns of a PatternCandidate, pairing the bars of two patterns as many times as
+        both have bars, or the bars of one pattern between themselves.
+
+        :param candidate: PatternCandidate
+        :param passes: maximum number of passes
+
+        :return: improved PatternCandidate, or the candidate itself if no move improves it
+        """
+        patterns = {}  # {rl tuple: bars}, every bar on its cheapest stock
+        for (l, rl_tuple), n in candidate.patterns.items():
+            patterns[rl_tuple] = patterns.get(rl_tuple, 0) + n
+        for i in range(passes):
+            used = {rl_tuple: sum(rl * k for rl, k in rl_tuple) for rl_tuple in patterns}
+            order = sorted(patterns, key=used.get)
+            merged = False
+            lo, hi = 0, len(order) - 1
+            while lo <= hi:
+                a, b = order[lo], order[hi]
+                pairs = min(patterns[a], patterns[b]) if a != b else patterns[a] // 2
+                if used[a] + used[b] > self.longest or pairs == 0:
+                    hi -= 1
+                    continue
+                if self.cost(used[a] + used[b]) - self.cost(used[a]) - self.cost(used[b]) < 0:
+                    counts = dict(a)
+                    for rl, k in b:
+                        counts[rl] = counts.get(rl, 0) + k
+                    c = tuple(sorted(counts.items()))
+                    patterns[a] -= pairs
+                    patterns[b] -= pairs
+                    patterns[c] = patterns.get(c, 0) + pairs
+                    merged = True
+                lo += 1
+            patterns = {rl_tuple: n for rl_tuple, n in patterns.items() if n > 0}
+            if not merged:
+                break
+        improved = PatternCandidate()
+        for rl_tuple, n in patterns.items():
+            l = self.stock(sum(rl * k for rl, k in rl_tuple))
+            improved.add_pattern(l, rl_tuple, n, self.stocks[l])
+        return improved if improved.cost < candidate.cost else candidate
@@ -0,0 +1,273 @@
+from bisect import bisect_right
+import numpy as np
+
+
+class Pheromone:
+    def __init__(self, stocks):
+        """
+        Pheromone trail with activity patterns interned to integer slots and weights held in numpy arrays.
+
+        Weights decay lazily: every weight is stored relative to a global offset, and decay only moves the offset.
+        A weight is alive while stored + offset > 0, dead slots are compacted away once they outnumber the living.
+        Sampling uses cumulative sums per stock length, rebuilt only when the trail changed.
+
+        :param stocks: dictionary of stocks
+
+        :return: None
+        """
+        self.stocks = list(stocks.keys())
+        self.offset = 0.0  # accumulated decay
+        self.version = 0  # bumped whenever a weight changes
+        self.pheno = {l: -np.inf for l in self.stocks}  # stored stock weights
+        self.keys = {l: [] for l in self.stocks}  # rl tuple of every slot
+        self.activities = {l: [] for l in self.stocks}  # activity of every slot
+        self.slots = {l: {} for l in self.stocks}  # {rl tuple: slot}
+        self.weights = {l: np.zeros(0) for l in self.stocks}  # stored geno weights per slot
+        self._cum = {}  # {l: (version, cumulative effective weights)}
+
+    def __len__(self):
+        """
+        Number of alive patterns.
+
+        :return: integer
+        """
+        return sum(int((self.weights[l] + self.offset > 0).sum()) for l in self.stocks)
+
+    def deposit(self, l, rl_tuple, weight=1):
+        """
+        Leave pheromone on a stock length and one of its patterns.
+
+        :param l: stock length
+        :param rl_tuple: pattern, sorted ((rl, count), ...) tuple
+        :param weight: amount of pheromone
+
+        :return: None
+        """
+        self.pheno[l] = max(self.pheno[l], -self.offset) + weight  # a dead weight restarts from 0
+        slot = self.slots[l].get(rl_tuple)
+        if slot is None:
+            slot = len(self.keys[l])
+            self.slots[l][rl_tuple] = slot
+            self.keys[l].append(rl_tuple)
+            self.activities[l].append([l] + [rl for rl, n in rl_tuple for i in range(n)])
+            if slot == len(self.weights[l]):  # grow by doubling
+                self.weights[l] = np.concatenate([self.weights[l], np.full(max(slot, 4), -np.inf)])
+        self.weights[l][slot] = max(self.weights[l][slot], -self.offset) + weight
+        self.version += 1
+
+    def decay(self, d):
+        """
+        Decay every weight by the specified amount.
+
+        :param d: rate of decay
+
+        :return: None
+        """
+        self.offset += d
+        self.version += 1
+
+    def pheno_weight(self, l):
+        """
+        Effective weight of a stock length.
+
+        :param l: stock length
+
+        :return: weight, 0 when dead
+        """
+        return max(self.pheno[l] + self.offset, 0.0)
+
+    def cumulative(self, l):
+        """
+        Cumulative effective geno weights of a stock length, compacting dead slots when they dominate.
+
+        :param l: stock length
+
+        :return: numpy array, one entry per slot
+        """
+        cached = self._cum.get(l)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        n = len(self.keys[l])
+        effective = np.maximum(self.weights[l][:n] + self.offset, 0.0)
+        alive = effective > 0
+        if 2 * int(alive.sum()) < n:
+            self._compact(l, alive)
+            effective = effective[alive]
+        cum = np.cumsum(effective)
+        self._cum[l] = (self.version, cum)
+        return cum
+
+    def activity(self, l, slot):
+        """
+        Activity of a pattern slot.
+
+        :param l: stock length
+        :param slot: slot index
+
+        :return: activity [l, rl...]
+        """
+        return list(self.activities[l][slot])
+
+    def pattern(self, l, slot):
+        """
+        Pattern of a slot.
+
+        :param l: stock length
+        :param slot: slot index
+
+        :return: sorted ((rl, count), ...) tuple
+        """
+        return self.keys[l][slot]
+
+    def items(self):
+        """
+        Iterate over alive patterns.
+
+        :return: generator of (l, rl tuple, weight)
+        """
+        for l in self.stocks:
+            n = len(self.keys[l])
+            for slot, w in enumerate((self.weights[l][:n] + self.offset).tolist()):
+                if w > 0:
+                    yield l, self.keys[l][slot], w
+
+    def to_dict(self):
+        """
+        Effective weights in the nested dictionary format {"pheno": {l: w}, "geno": {l: {rl tuple: w}}}.
+
+        :return: dictionary
+        """
+        p = {"pheno": {}, "geno": {}}
+        for l in self.stocks:
+            if self.pheno_weight(l) > 0:
+                p["pheno"][l] = self.pheno_weight(l)
+        for l, rl_tuple, w in self.items():
+            p["geno"].setdefault(l, {})[rl_tuple] = w
+        return p
+
+    @classmethod
+    def from_dict(cls, stocks, p):
+        """
+        Build a trail from the nested dictionary format.
+
+        :param stocks: dictionary of stocks
+        :param p: {"pheno": {l: w}, "geno": {l: {rl tuple: w}}}
+
+        :return: Pheromone
+        """
+        trail = cls(stocks)
+        for l, genos in p.get("geno", {}).items():
+            for rl_tuple, w in genos.items():
+                trail.deposit(l, rl_tuple, w)
+        for l in trail.stocks:
+            trail.pheno[l] = p.get("pheno", {}).get(l, -np.inf)
+        return trail
+
+    def view(self):
+        """
+        A per-ant view of the trail, able to mask invalid choices without copying the trail.
+
+        :return: TrailView
+        """
+        return TrailView(self)
+
+    def _compact(self, l, alive):
+        """
+        Drop dead slots of a stock length.
+
+        :param l: stock length
+        :param alive: boolean mask over slots
+
+        :return: None
+        """
+        keep = np.flatnonzero(alive).tolist()
+        self.keys[l] = [self.keys[l][i] for i in keep]
+        self.activities[l] = [self.activities[l][i] for i in keep]
+        self.slots[l] = {key: i for i, key in enumerate(self.keys[l])}
+        self.weights[l] = self.weights[l][:len(alive)][alive].copy()
+
+
+class TrailView:
+    def __init__(self, trail):
+        """
+        Sampling state of one ant: the trail plus the patterns it found invalid.
+
+        :param trail: Pheromone
+
+        :return: None
+        """
+        self.trail = trail
+        self.masked = {l: set() for l in trail.stocks}  # invalid slots per stock length
+        self.masked_weight = {l: 0.0 for l in trail.stocks}
+        self._local = {}  # {l: (number of masked slots, cumulative weights with masked slots zeroed)}
+        self._stocks = None  # (open stock lengths, cumulative pheno weights), None when stale
+
+    def exclude(self, l, slot):
+        """
+        Mask an invalid pattern for the rest of this ant's travel.
+
+        :param l: stock length
+        :param slot: slot index
+
+        :return: None
+        """
+        if slot not in self.masked[l]:
+            cum = self.trail.cumulative(l)
+            self.masked[l].add(slot)
+            self.masked_weight[l] += cum[slot] - (cum[slot - 1] if slot > 0 else 0.0)
+            if self.available(l) <= 1e-9:  # stock length closed for this ant
+                self._stocks = None
+
+    def available(self, l):
+        """
+        Effective geno weight of a stock length still open to this ant.
+
+        :param l: stock length
+
+        :return: weight
+        """
+        cum = self.trail.cumulative(l)
+        if len(cum) == 0:
+            return 0.0
+        return cum[-1] - self.masked_weight[l]
+
+    def sample(self, draw):
+        """
+        Choose a stock length by pheno weight, then one of its patterns by geno weight.
+
+        :param draw: callable returning a uniform draw in [0, 1)
+
+        :return: (stock length, slot), None when every pattern is dead or masked
+        """
+        if self._stocks is None:
+            stocks = [l for l in self.trail.stocks if self.trail.pheno_weight(l) > 0 and self.available(l) > 1e-9]
+            self._stocks = (stocks, np.cumsum([self.trail.pheno_weight(l) for l in stocks]).tolist())
+        stocks, weights = self._stocks
+        if not stocks:
+            return None
+        l = stocks[min(bisect_right(weights, draw() * weights[-1]), len(stocks) - 1)]
+        return l, self._sample_slot(l, draw)
+
+    def _sample_slot(self, l, draw):
+        """
+        Choose an unmasked pattern of a stock length. Masked draws are rejected while the masked share is small,
+        otherwise the draw uses local cumulative weights with the masked slots zeroed.
+
+        :param l: stock length
+        :param draw: callable returning a uniform draw in [0, 1)
+
+        :return: slot
+        """
+        cum = self.trail.cumulative(l)
+        if 2 * self.masked_weight[l] > cum[-1]:
+            local = self._local.get(l)
+            if local is None or local[0] != len(self.masked[l]):
+                effective = np.diff(cum, prepend=0.0)
+                effective[list(self.masked[l])] = 0.0
+                local = (len(self.masked[l]), np.cumsum(effective))
+                self._local[l] = local
+            cum = local[1]
+        while True:
+            slot = min(int(np.searchsorted(cum, draw() * cum[-1], side="right")), len(cum) - 1)
+            if slot not in self.masked[l]:
+                return slot
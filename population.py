@@ -0,0 +1,112 @@
+import numpy as np
+from candidate import Candidate
+
+
+class ArrayPopulation:
+    def __init__(self, stocks, orders, owner, stock_idx, counts, size):
+        """
+        Array-backed population, every activity of every candidate is a row.
+
+        :param stocks: dictionary of stocks {l: c}
+        :param orders: dictionary of orders {rl: q}
+        :param owner: candidate index of every activity
+        :param stock_idx: stock index of every activity
+        :param counts: pattern-count matrix, pieces of every requested length per activity
+        :param size: number of candidates
+
+        :return: None
+        """
+        self.stocks = stocks
+        self.orders = orders
+        self.lengths = np.array(list(stocks.keys()))
+        self.costs = np.array(list(stocks.values()), dtype=float)
+        self.order_lengths = np.array(sorted(orders.keys()), dtype=int)
+        self.owner = owner
+        self.stock_idx = stock_idx
+        self.counts = counts
+        self.size = size
+
+    @classmethod
+    def from_candidates(cls, stocks, orders, pop):
+        """
+        Build an array population from a list of candidates.
+
+        :param stocks: dictionary of stocks {l: c}
+        :param orders: dictionary of orders {rl: q}
+        :param pop: array of candidates
+
+        :return: array population
+        """
+        stock_pos = {l: i for i, l in enumerate(stocks.keys())}
+        order_pos = {rl: i for i, rl in enumerate(sorted(orders.keys()))}
+        owner = []
+        stock_idx = []
+        piece_row = []
+        piece_col = []
+        for i, c in enumerate(pop):
+            for a in c:
+                row = len(owner)
+                owner.append(i)
+                stock_idx.append(stock_pos[a[0]])
+                for rl in a[1:]:
+                    piece_row.append(row)
+                    piece_col.append(order_pos[rl])
+        counts = np.zeros((len(owner), len(order_pos)), dtype=np.int32)
+        np.add.at(counts, (np.array(piece_row, dtype=np.intp), np.array(piece_col, dtype=np.intp)), 1)
+        return cls(stocks, orders, np.array(owner, dtype=np.intp), np.array(stock_idx, dtype=np.intp), counts, len(pop))
+
+    def to_candidates(self):
+        """
+        Convert the array population back to a list of candidates.
+
+        :return: array of candidates
+        """
+        pop = [Candidate() for i in range(self.size)]
+        lengths = self.lengths.tolist()
+        order_lengths = self.order_lengths.tolist()
+        for row, (i, s) in enumerate(zip(self.owner.tolist(), self.stock_idx.tolist())):
+            a = [lengths[s]]
+            for j in np.flatnonzero(self.counts[row]).tolist():
+                a += [order_lengths[j]] * int(self.counts[row, j])
+            pop[i].add(a, self.stocks[a[0]])
+        return pop
+
+    def fitness(self):
+        """
+        Calculates the fitness of every candidate in one reduction.
+
+        :return: array of fitness, indexed by candidate
+        """
+        return np.bincount(self.owner, weights=self.costs[self.stock_idx], minlength=self.size)
+
+    def select(self, mask):
+        """
+        Return a new array population holding the selected candidates only.
+
+        :param mask: boolean mask over candidates
+
+        :return: array population
+        """
+        mask = np.asarray(mask, dtype=bool)
+        new_index = np.cumsum(mask) - 1
+        rows = mask[self.owner]
+        return ArrayPopulation(self.stocks, self.orders, new_index[self.owner[rows]], self.stock_idx[rows],
+                               self.counts[rows], int(mask.sum()))
+
+
+def gaussian_mask(fitness, k=1, stats=None):
+    """
+    Boolean mask of candidates whose fitness lies within k standard deviations of the mean.
+
+    :param fitness: array of fitness
+    :param k: number of standard deviations
+    :param stats: running statistics of the fitness, spares recomputing mean and std
+
+    :return: boolean mask
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    if stats is not None:
+        mean_fitness, std_fitness = stats.mean, stats.std
+    else:
+        mean_fitness, std_fitness = fitness.mean(), fitness.std()
+    return (fitness >= mean_fitness - k*std_fitness) & (fitness <= mean_fitness + k*std_fitness)
@@ -1,54 +1,192 @@
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import stats
+from population import ArrayPopulation
+from candidate import Candidate, PatternCandidate
+from feasible import FeasibleIndex
+from greedy import Greedy, STRATEGIES
+from ledger import OrderLedger
+from random_stream import RandomStream
+from bounds import optimality_gap, gap_closed
+from instrument import Instruments, timed, SUMMARY, PROGRESS
+from anytime import Control
+from runlog import RunLog
+
+PACKED_PIECES = 10000  # order books with at least this many pieces are solved with PatternCandidates
 
 class RandomSearch:
     def __init__(self, stocks, rng):
         """
         :param stocks: dictionary of stocks
-        :param rng: random number generator
+        :param rng: numpy random Generator of the engine, or a seed it is created from
 
         :return:
         """
-        self.rng = rng
+        self.generator = np.random.default_rng(rng)
+        self.stream = RandomStream(self.generator)  # pre-drawn blocks for scalar draws
         self.stocks = stocks
+        self.stock_lengths = list(stocks.keys())
         self.orders = {}
+        self.index = FeasibleIndex(stocks, self.orders)  # requested lengths fittable per capacity
+        self.ledger = OrderLedger(self.orders)  # remaining demand of a fresh order book
+        self.packed = False  # candidates held as patterns with repeat counts
+        self.greedy = Greedy(stocks)  # greedy constructors
+        self.init = "random"  # construction strategy of initial populations
+        self.fill = "random"  # construction strategy completing mutated and crossed candidates
+        self.noise = 0.2  # perturbation of the piece order of randomized greedy constructions
+        self.bound = None  # lower bound of the problem
+        self.gap_tol = 0.0  # accepted optimality gap
+        self.inst = Instruments()  # timers, counters and verbosity
+        self.control = Control()  # deadline, cancellation and improvement listeners
 
-    def run(self, iterations=100, t=4, target=0, population=100):
+    @timed("rs.run")
+    def run(self, iterations=100, t=4, target=0, population=100, workers=1, seed=None):
         """
         Runs the random search over the given number of iterations,
         or time,
         or until target is reached.
 
+        Every iteration is a batch built from its own random stream, spawned from one root seed, so the best
+        solution and the improvement log only depend on the seed, not on the number of workers.
+
         :param iterations: number of iterations
-        :param t: time
+        :param t: time, checked after every batch
         :param target: solution fitness target
         :param population: number of population
+        :param workers: number of worker processes, 1 runs in this process
+        :param seed: root seed of the batch streams, drawn from the engine's generator if None
 
         :return: the best solution, fitness, time elapsed (in seconds)
         """
-        log = {"candidates": [],
-               "times": []}
-        print("----Random Search----")
+        log = self.inst.run_log("rs.run")
+        self.inst.log(SUMMARY, "----Random Search----")
         start_time = time.time()
-        go = True
         best = []  # best candidate
-        while go:
-            for i in range(iterations):
-                print("Iteration {}".format(i))
-                pop = []  # array of candidates
-                for j in range(population):
-                    pop.append(self.random_candidate())
-                best, log = self.get_best(best, pop, log=log, start_time=start_time)
+        if seed is None:
+            seed = int(self.generator.integers(1 << 63))
+        root = np.random.SeedSequence(seed)
+        seeds = (root.spawn(1)[0] for i in range(iterations))  # one stream per batch, spawned as needed
+        executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            for i, improvements in enumerate(self._batches(seeds, population, executor, 2*workers)):
+                self.inst.log(PROGRESS, "Iteration {}".format(i))
+                self.inst.count("candidates", population)
+                best, log = self.get_best(best, improvements, log=log, start_time=start_time)
+                self.control.improved(best, self.get_fitness(best))
+                if self.bound is not None:
+                    self.inst.log(PROGRESS, "Optimality gap: {:.2%}".format(optimality_gap(self.get_fitness(best), self.bound)))
+                if gap_closed(self.get_fitness(best), self.bound, self.gap_tol):
+                    self.inst.log(SUMMARY, "Optimality gap closed! Terminating.")
+                    return best, self.get_fitness(best), time.time() - start_time, log
                 if self.get_fitness(best) <= target:
-                    go = False
-                    print("Target reached! Terminating.")
-                    return best, self.get_fitness(best), time.time() - start_time  # target hit, terminate early
-            go = False
-        print("Search cycle finished. Terminating.")
+                    self.inst.log(SUMMARY, "Target reached! Terminating.")
+                    return best, self.get_fitness(best), time.time() - start_time, log  # target hit, terminate early
+                if time.time() - start_time > t or self.control.expired():
+                    self.inst.log(SUMMARY, "Time is up. Terminating.")
+                    return best, self.get_fitness(best), time.time() - start_time, log
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            log.close()
+        self.inst.log(SUMMARY, "Search cycle finished. Terminating.")
         return best, self.get_fitness(best), time.time() - start_time, log
 
+    def _batches(self, seeds, population, executor, window):
+        """
+        Yield the improvements of every batch, in seed order.
+
+        :param seeds: iterable of SeedSequence, one per batch
+        :param population: number of candidates per batch
+        :param executor: process pool, or None to run in this process
+        :param window: maximum number of batches submitted ahead
+
+        :return: generator of improvement arrays
+        """
+        if executor is None:
+            for s in seeds:
+                yield search_batch(self.stocks, self.orders, population, s, self.construction())
+            return
+        seeds = iter(seeds)
+        pending = deque(executor.submit(search_batch, self.stocks, self.orders, population, s, self.construction())
+                        for s in islice(seeds, window))
+        while pending:
+            improvements = pending.popleft().result()
+            for s in islice(seeds, 1):
+                pending.append(executor.submit(search_batch, self.stocks, self.orders, population, s,
+                                               self.construction()))
+            yield improvements
+
+    def set_bound(self, bound, gap_tol=0.0):
+        """
+        Set the lower bound used to report the optimality gap and stop once it closes.
+
+        :param bound: lower bound of the problem, None disables it
+        :param gap_tol: accepted relative gap
+
+        :return: None
+        """
+        self.bound = bound
+        self.gap_tol = gap_tol
+
+    def set_instruments(self, inst):
+        """
+        Set the instruments recording timers, counters and output verbosity.
+
+        :param inst: Instruments
+
+        :return: None
+        """
+        self.inst = inst
+
+    def set_control(self, control):
+        """
+        Set the run control: deadline, cancellation and improvement listeners.
+
+        :param control: Control
+
+        :return: None
+        """
+        self.control = control
+
+    def set_construction(self, init="random", fill="random", noise=0.2):
+        """
+        Set the construction strategies: "random" (uniform random), "ffd" (First-Fit-Decreasing), "bfd"
+        (Best-Fit-Decreasing) or "cost" (Best-Fit-Decreasing on the stock with the lowest cost per unit length).
+
+        :param init: strategy of initial populations
+        :param fill: strategy completing mutated and crossed candidates
+        :param noise: perturbation of the piece order of randomized greedy constructions
+
+        :return: None
+        """
+        for strategy in (init, fill):
+            if strategy not in STRATEGIES:
+                raise ValueError("Unknown construction strategy: {}".format(strategy))
+        self.init = init
+        self.fill = fill
+        self.noise = noise
+
+    def construction(self):
+        """
+        Construction strategies, to hand to worker processes.
+
+        :return: init, fill, noise
+        """
+        return self.init, self.fill, self.noise
+
+    def reseed(self, seed):
+        """
+        Restart the random stream from a seed.
+
+        :param seed: integer or SeedSequence
+
+        :return: None
+        """
+        self.generator = np.random.default_rng(seed)
+        self.stream = RandomStream(self.generator)
+
     def set_order(self, orders):
         """
         Set order
@@ -58,32 +196,145 @@ class RandomSearch:
         :return:
         """
         self.orders = orders
+        self.index = FeasibleIndex(self.stocks, orders)
+        self.ledger = OrderLedger(orders)
+        self.packed = self.ledger.total >= PACKED_PIECES
 
-    def random_candidate(self, orders=None, candidate=None):
+    def new_candidate(self):
+        """
+        Empty candidate, a PatternCandidate for large order books.
+
+        :return: Candidate or PatternCandidate
+        """
+        return PatternCandidate() if self.packed else Candidate()
+
+    def as_candidates(self, pop):
+        """
+        Wrap the plain activity lists of a predefined population in Candidates, with their cost.
+
+        :param pop: array of candidates or of activity lists
+
+        :return: array of candidates
+        """
+        return [c if isinstance(c, (Candidate, PatternCandidate)) else Candidate(c, self.get_fitness(c)) for c in pop]
+
+    def random_candidate(self, orders=None, candidate=None, rng=None):
         """
         Generates a random candidate and returns it.
 
-        :param orders: dictionary of orders
-        :param candidate: existing candidate
+        :param orders: remaining orders, OrderLedger (consumed in place) or dictionary of orders
+        :param candidate: existing candidate, completed in place when it is a Candidate or a PatternCandidate
+        :param rng: source of uniform draws with a random() method, the engine's stream if None
 
         :return: candidate
         """
+        if rng is None:
+            rng = self.stream
         if orders is None:
-            orders = self.orders.copy()
+            orders = self.ledger.copy()
+        elif not isinstance(orders, OrderLedger):
+            orders = OrderLedger(orders)
         if candidate is None:
-            candidate = []  # array of activities
-        while sum(orders.values()) > 0:  # while there are orders remaining
+            candidate = self.new_candidate()
+        elif not isinstance(candidate, (Candidate, PatternCandidate)):
+            candidate = Candidate(candidate, self.get_fitness(candidate))
+        if isinstance(candidate, PatternCandidate):
+            return self.random_patterns(orders, candidate, rng)
+        draw = rng.random
+        mask_at = self.index.mask_at
+        while orders.total > 0:  # while there are orders remaining
             # array of used stock length and covered orders, {l, {rl...}}
-            a = [self.rng.choice(list(self.stocks.keys()))]
-            fittable_orders = self._get_fittable_orders(a, orders)
-            while fittable_orders:  # while more orders can fit into this activity
-                order = self.rng.choice(fittable_orders)
+            a = [self.stock_lengths[int(draw() * len(self.stock_lengths))]]
+            capacity = a[0]
+            fittable = orders.active & self.index.stock_masks[a[0]]
+            while fittable:  # while more orders can fit into this activity
+                order = self.index.pick(fittable, draw)
                 a.append(order)
-                orders[order] -= 1
-                fittable_orders = self._get_fittable_orders(a, orders)
-            candidate.append(a)
+                orders.take(order)
+                capacity -= order
+                fittable = orders.active & mask_at(capacity)
+            candidate.add(a, self.stocks[a[0]])
+        return candidate
+
+    def random_patterns(self, orders, candidate, rng):
+        """
+        Complete a PatternCandidate randomly. Every new pattern is built as in random_candidate, then repeated a
+        random number of times, up to as many times as it still fits the remaining orders.
+
+        :param orders: remaining orders, OrderLedger consumed in place
+        :param candidate: PatternCandidate, completed in place
+        :param rng: source of uniform draws with a random() method
+
+        :return: candidate
+        """
+        draw = rng.random
+        mask_at = self.index.mask_at
+        while orders.total > 0:
+            l = self.stock_lengths[int(draw() * len(self.stock_lengths))]
+            capacity = l
+            rl_counter = {}
+            fittable = orders.active & self.index.stock_masks[l]
+            while fittable:
+                order = self.index.pick(fittable, draw)
+                rl_counter[order] = rl_counter.get(order, 0) + 1
+                orders.take(order)
+                capacity -= order
+                fittable = orders.active & mask_at(capacity)
+            rl_tuple = tuple(sorted(rl_counter.items()))
+            extra = int(draw() * (orders.repeats(rl_tuple) + 1))  # further bars of the same pattern
+            orders.subtract_pattern(rl_tuple, extra)
+            candidate.add_pattern(l, rl_tuple, 1 + extra, self.stocks[l])
         return candidate
 
+    def fill_candidate(self, orders, candidate, rng=None):
+        """
+        Complete a candidate with the fill strategy, greedy fills are randomized.
+
+        :param orders: remaining orders of the candidate, OrderLedger consumed in place
+        :param candidate: candidate, completed in place
+        :param rng: source of uniform draws with a random() method, the engine's stream if None
+
+        :return: completed candidate
+        """
+        if self.fill == "random":
+            return self.random_candidate(orders, candidate, rng)
+        if rng is None:
+            rng = self.stream
+        return self.greedy.construct(orders, candidate, self.fill, self.noise, rng.random)
+
+    @timed("construction")
+    def initial_candidates(self, n, rng=None):
+        """
+        Initial population built with the init strategy. A greedy population holds the deterministic greedy
+        candidate first, then randomized greedy ones.
+
+        :param n: number of candidates
+        :param rng: source of uniform draws with a random() method, the engine's stream if None; engines pass
+            their own stream so that their runs do not depend on each other
+
+        :return: array of candidates
+        """
+        if rng is None:
+            rng = self.stream
+        if self.init == "random":
+            return self.random_candidates(n, rng)
+        self.inst.count("candidates", n)
+        return [self.greedy.construct(self.ledger.copy(), self.new_candidate(), self.init, self.noise if i else 0.0,
+                                      rng.random) for i in range(n)]
+
+    @timed("construction")
+    def random_candidates(self, n, rng=None):
+        """
+        Generates n random candidates, drawing from pre-drawn blocks of the numpy generator.
+
+        :param n: number of candidates
+        :param rng: source of uniform draws with a random() method, the engine's stream if None
+
+        :return: array of candidates
+        """
+        self.inst.count("candidates", n)
+        return [self.random_candidate(rng=rng or self.stream) for i in range(n)]
+
     def get_fitness(self, candidate):
         """
         Calculates the fitness of the candidate (total cost), lower the better.
@@ -92,56 +343,67 @@ class RandomSearch:
 
         :return: integer of the fitness
         """
+        if isinstance(candidate, (Candidate, PatternCandidate)):
+            return candidate.cost
         cost = 0
         for a in candidate:
             cost += self.stocks[a[0]]
         return cost
 
+    @timed("fitness")
+    def get_fitnesses(self, pop):
+        """
+        Calculates the fitness of every candidate in the population at once.
+
+        :param pop: array of candidates or an ArrayPopulation
+
+        :return: numpy array of fitness, indexed by candidate
+        """
+        if isinstance(pop, ArrayPopulation):
+            return pop.fitness()
+        if all(isinstance(c, (Candidate, PatternCandidate)) for c in pop):
+            return np.fromiter((c.cost for c in pop), dtype=float, count=len(pop))
+        costs = np.array(list(self.stocks.values()), dtype=float)
+        stock_pos = {l: i for i, l in enumerate(self.stocks.keys())}
+        sizes = np.fromiter((len(c) for c in pop), dtype=np.intp, count=len(pop))
+        stock_idx = np.fromiter((stock_pos[a[0]] for c in pop for a in c), dtype=np.intp, count=int(sizes.sum()))
+        return np.bincount(np.repeat(np.arange(len(pop)), sizes), weights=costs[stock_idx], minlength=len(pop))
+
     def get_best(self, best, pop, log=None, start_time=None):
         """
         Return the best candidate within the population.
 
         :param best: current best candidate
         :param pop: population
+        :param log: RunLog recording every improvement, None skips logging
+        :param start_time: start of the run, times are logged relative to it
 
-        :return: the best candidate (lowest cost)
+        :return: the best candidate (lowest cost), and the log if given
         """
         for c in pop:
             if len(best) == 0 or self.get_fitness(c) < self.get_fitness(best):
                 best = c
                 if log is not None:
-                    log["candidates"].append(best)
-                    log["times"].append(time.time() - start_time)
+                    log.record(best, self.get_fitness(best), time.time() - start_time)
         if log is not None:
             return best, log
         return best
 
-    def _get_fittable_orders(self, a, orders):
-        """
-        Return a list of orders where quantities are greater than 0 and,
-        lengths less or equal to the available activity length.
-
-        :param a: current activity array
-
-        :return: an array of fittable orders
-        """
-        fittable_orders = [rl for rl, q in orders.items() if q > 0 and rl <= a[0] - sum(a[1:])]
-        return fittable_orders
-
-    def plot_gaussian(self, k=500, pop=None, iterations=None):
+    def plot_gaussian(self, k=500, pop=None, iterations=None, path=None):
         """
         Plots the gaussian distribution.
 
         :param k: size of population
         :param pop: the population fitness
         :param iterations: number of iterations
+        :param path: image file the plot is saved to, shown interactively if None
 
         :return:
         """
+        import matplotlib.pyplot as plt  # imported on demand, plotting is optional
+        from scipy import stats
         if pop is None:
-            pop = []
-            for i in range(k):
-                pop.append(self.get_fitness(self.random_candidate()))
+            pop = list(self.get_fitnesses(self.random_candidates(k)))
 
         pop = pop
 
@@ -166,6 +428,29 @@ class RandomSearch:
             plt.title("Fitness Distribution")
         plt.legend()
         plt.grid(True)
-        plt.show()
+        if path is None:
+            plt.show()
+        else:
+            plt.savefig(path)
+            plt.close()
+
+
+def search_batch(stocks, orders, population, seed, construction=None):
+    """
+    Build one batch of random candidates from its own stream and return its running improvements.
 
+    :param stocks: dictionary of stocks
+    :param orders: dictionary of orders
+    :param population: number of candidates
+    :param seed: SeedSequence of the batch
+    :param construction: construction strategies (init, fill, noise), uniform random if None
 
+    :return: the candidates that improved on every earlier candidate of the batch, in order
+    """
+    rs = RandomSearch(stocks, np.random.default_rng(seed))
+    rs.set_order(orders)
+    if construction is not None:
+        rs.set_construction(*construction)
+    pop = rs.initial_candidates(population)
+    best, log = rs.get_best([], pop, log=RunLog(), start_time=time.time())
+    return log.candidates
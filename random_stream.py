@@ -0,0 +1,38 @@
+from itertools import chain
+
+
+class RandomStream:
+    def __init__(self, generator, block=4096):
+        """
+        Uniform draws served from pre-drawn blocks of a numpy Generator.
+
+        random is the __next__ of a chained iterator over the blocks, so a single draw costs no Python frame.
+        Offers the random/choice subset of the random module, and can be passed wherever an rng is
+        expected.
+
+        :param generator: numpy random Generator
+        :param block: number of uniform draws per block
+
+        :return: None
+        """
+        self.generator = generator
+        self.block = block
+        self.random = chain.from_iterable(iter(self._draw_block, None)).__next__  # next uniform in [0, 1)
+
+    def _draw_block(self):
+        """
+        Draw the next block of uniforms.
+
+        :return: list of floats
+        """
+        return self.generator.random(self.block).tolist()
+
+    def choice(self, seq):
+        """
+        Random element of a non-empty sequence.
+
+        :param seq: sequence
+
+        :return: element
+        """
+        return seq[int(self.random() * len(seq))]
@@ -0,0 +1,171 @@
+import heapq
+
+
+class Ranking:
+    def __init__(self, priorities=None):
+        """
+        Indexed binary min-heap of keys by priority, ties broken by key.
+
+        Updates, removals and pops are O(log n). shift() lowers every priority at once in O(1) by moving a
+        common base, priorities are stored relative to it.
+
+        :param priorities: dictionary {key: priority}
+
+        :return: None
+        """
+        self.base = 0  # common shift of all priorities
+        self.heap = []  # array of (stored priority, key)
+        self.pos = {}  # {key: index in heap}
+        if priorities:
+            self.heap = [(p, key) for key, p in priorities.items()]
+            heapq.heapify(self.heap)
+            self.pos = {key: i for i, (p, key) in enumerate(self.heap)}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, key):
+        return key in self.pos
+
+    def peek(self):
+        """
+        Key with the lowest priority.
+
+        :return: (key, priority)
+        """
+        p, key = self.heap[0]
+        return key, p - self.base
+
+    def push(self, key, priority):
+        """
+        Insert a key, or update it if already present.
+
+        :param key: key
+        :param priority: priority
+
+        :return: None
+        """
+        if key in self.pos:
+            self.update(key, priority)
+            return
+        self.heap.append((priority + self.base, key))
+        self.pos[key] = len(self.heap) - 1
+        self._sift_up(len(self.heap) - 1)
+
+    def update(self, key, priority):
+        """
+        Change the priority of a key.
+
+        :param key: key
+        :param priority: new priority
+
+        :return: None
+        """
+        i = self.pos[key]
+        old = self.heap[i]
+        self.heap[i] = (priority + self.base, key)
+        if self.heap[i] < old:
+            self._sift_up(i)
+        else:
+            self._sift_down(i)
+
+    def remove(self, key):
+        """
+        Remove a key.
+
+        :param key: key
+
+        :return: priority of the removed key
+        """
+        i = self.pos.pop(key)
+        p, k = self.heap[i]
+        last = self.heap.pop()
+        if i < len(self.heap):
+            self.heap[i] = last
+            self.pos[last[1]] = i
+            self._sift_up(i)
+            self._sift_down(self.pos[last[1]])
+        return p - self.base
+
+    def pop(self):
+        """
+        Remove the key with the lowest priority.
+
+        :return: (key, priority)
+        """
+        key, p = self.peek()
+        self.remove(key)
+        return key, p
+
+    def shift(self, delta):
+        """
+        Subtract delta from every priority.
+
+        :param delta: amount
+
+        :return: None
+        """
+        self.base += delta
+
+    def smallest(self, k):
+        """
+        The k keys with the lowest priority, in order, without modifying the heap. O(k log k).
+
+        :param k: number of keys
+
+        :return: array of keys
+        """
+        keys = []
+        frontier = [(self.heap[0], 0)] if self.heap else []
+        while frontier and len(keys) < k:
+            entry, i = heapq.heappop(frontier)
+            keys.append(entry[1])
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(self.heap):
+                    heapq.heappush(frontier, (self.heap[child], child))
+        return keys
+
+    def _sift_up(self, i):
+        heap, pos = self.heap, self.pos
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[i] = heap[parent]
+            pos[heap[i][1]] = i
+            i = parent
+        heap[i] = entry
+        pos[entry[1]] = i
+
+    def _sift_down(self, i):
+        heap, pos = self.heap, self.pos
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[i] = heap[child]
+            pos[heap[i][1]] = i
+            i = child
+        heap[i] = entry
+        pos[entry[1]] = i
+
+
+def elites(pop, k, key):
+    """
+    The k best candidates of a population.
+
+    :param pop: array of candidates
+    :param k: number of elites
+    :param key: fitness function, lower the better
+
+    :return: array of candidates, best first
+    """
+    ranking = Ranking({i: key(c) for i, c in enumerate(pop)})
+    return [pop[i] for i in ranking.smallest(k)]
@@ -0,0 +1,149 @@
+import json
+import math
+from collections import deque
+import numpy as np
+
+
+class RunLog:
+    def __init__(self, capacity=256, limit=None, path=None, name="run"):
+        """
+        Log of a run: the fitness and time of every event in preallocated arrays, and the candidate only when it
+        improves on every earlier event.
+
+        :param capacity: initial size of the arrays, doubled when full
+        :param limit: keep only the last limit events and improvements (ring buffer), None keeps everything
+        :param path: JSONL file every event is appended to, None skips spilling
+        :param name: run name written as the first line of the spill file
+
+        :return: None
+        """
+        self.limit = limit
+        size = capacity if limit is None else limit
+        self._times = np.empty(size)
+        self._fitness = np.empty(size)
+        self.first = 0  # position of the oldest event held
+        self.held = 0  # number of events held
+        self.recorded = 0  # number of events ever recorded
+        self.improvements = deque(maxlen=limit)  # (event number, time, fitness, candidate), oldest first
+        self.best_fitness = math.inf
+        self.path = path
+        self.file = None
+        if path is not None:
+            self.file = open(path, "a", buffering=1)
+            self.file.write(json.dumps({"run": name}) + "\n")
+
+    def __len__(self):
+        return self.held
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, candidate, fitness, t, spill=True):
+        """
+        Record an event. The candidate is only kept if its fitness beats every earlier event.
+
+        :param candidate: best candidate at the event, may be None
+        :param fitness: its fitness
+        :param t: seconds since the start of the run
+        :param spill: append the event to the spill file
+
+        :return: True if the event is an improvement
+        """
+        size = len(self._times)
+        if self.held == size:
+            if self.limit is None:  # grow
+                self._times = np.concatenate([self._times, np.empty(size)])
+                self._fitness = np.concatenate([self._fitness, np.empty(size)])
+                size *= 2
+            else:  # overwrite the oldest event
+                self.first = (self.first + 1) % size
+                self.held -= 1
+        i = (self.first + self.held) % size
+        self._times[i] = t
+        self._fitness[i] = fitness
+        self.held += 1
+        self.recorded += 1
+        improved = fitness < self.best_fitness
+        if improved:
+            self.best_fitness = fitness
+            self.improvements.append((self.recorded - 1, t, fitness, candidate))
+        if spill and self.file is not None:
+            event = {"time": float(t), "fitness": float(fitness)}
+            if improved and candidate is not None:
+                event["candidate"] = [list(a) for a in candidate]
+            self.file.write(json.dumps(event) + "\n")
+        return improved
+
+    def extend(self, other, offset=0.0):
+        """
+        Append the events of another log, shifted in time. Events the other log already spilled to the same file
+        are not written again.
+
+        :param other: RunLog
+        :param offset: seconds added to the other log's times
+
+        :return: None
+        """
+        candidates = {n: c for n, t, f, c in other.improvements}
+        first = other.recorded - other.held
+        spill = other.path is None or other.path != self.path
+        for n, (t, f) in enumerate(zip(other.times.tolist(), other.fitness.tolist()), first):
+            self.record(candidates.get(n), f, t + offset, spill)
+
+    @property
+    def times(self):
+        """
+        Times of the events held, oldest first.
+
+        :return: numpy array
+        """
+        return np.roll(self._times, -self.first)[:self.held] if self.first else self._times[:self.held]
+
+    @property
+    def fitness(self):
+        """
+        Fitness of the events held, oldest first.
+
+        :return: numpy array
+        """
+        return np.roll(self._fitness, -self.first)[:self.held] if self.first else self._fitness[:self.held]
+
+    @property
+    def candidates(self):
+        """
+        Candidates of the improvements held, oldest first.
+
+        :return: array of candidates
+        """
+        return [c for n, t, f, c in self.improvements]
+
+    @property
+    def trace(self):
+        """
+        Best fitness against time, improvements only.
+
+        :return: array of (time, fitness)
+        """
+        return [(t, f) for n, t, f, c in self.improvements]
+
+    @property
+    def best(self):
+        """
+        Best candidate recorded.
+
+        :return: candidate, None if nothing was recorded
+        """
+        return self.improvements[-1][3] if self.improvements else None
+
+    def close(self):
+        """
+        Close the spill file, the events stay held in memory. Engines close their logs once the run finishes.
+
+        :return: None
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None